@@ -7,7 +7,9 @@ from app.models import (
     H5075HistoricalMeasurement,
     H5075HistorySyncState,
     H5075Measurement,
+    H5075MeasurementRollup,
 )
+from app.rollups import rebuild_rollups
 
 
 class SessionModelAdmin(admin.ModelAdmin):
@@ -50,6 +52,30 @@ class H5075HistoricalMeasurementAdmin(admin.ModelAdmin):
     list_filter = ("measured_at",)
     search_fields = ("address", "name")
 
+    def save_model(self, request, obj, form, change) -> None:
+        addresses = {obj.address.strip().lower()}
+        if change:
+            # The row may move to another device; both lose or gain a sample.
+            addresses.update(H5075HistoricalMeasurement.objects.filter(pk=obj.pk).values_list("address", flat=True))
+        super().save_model(request, obj, form, change)
+        self._history_changed(addresses)
+
+    def delete_model(self, request, obj) -> None:
+        super().delete_model(request, obj)
+        self._history_changed([obj.address])
+
+    def delete_queryset(self, request, queryset) -> None:
+        addresses = set(queryset.values_list("address", flat=True))
+        super().delete_queryset(request, queryset)
+        self._history_changed(addresses)
+
+    @staticmethod
+    def _history_changed(addresses) -> None:
+        # Edits here bypass the ingest commands. Sums fold in incrementally but minima and maxima cannot
+        # be taken back out, so the affected devices' rollups are recomputed from the raw rows; that also
+        # invalidates their cached responses and bumps their history versions.
+        rebuild_rollups(H5075MeasurementRollup.SOURCE_HISTORY, addresses=addresses)
+
 
 @admin.register(H5075HistorySyncState)
 class H5075HistorySyncStateAdmin(admin.ModelAdmin):
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Protocol
+
+from django.utils import timezone
+
+from app.history_cache import invalidate_history_cache
+from app.models import H5075DeviceAlias
+
+
+class DetectedDevice(Protocol):
+    address: str
+    name: str
+
+
+def get_name_map(addresses: Iterable[str]) -> dict[str, str]:
+    """Display name per lower-cased address for every address that has an alias row."""
+    normalized = sorted({(address or "").strip().lower() for address in addresses if address})
+    if not normalized:
+        return {}
+
+    aliases = H5075DeviceAlias.objects.filter(address__in=normalized)
+    return {item.address.lower(): (item.alias or item.detected_name or item.address) for item in aliases}
+
+
+def upsert_detected_names(devices: Iterable[DetectedDevice]) -> int:
+    """Record the advertised name of every device, creating alias rows for new addresses.
+
+    Addresses are de-duplicated (the last name seen wins) and compared against the stored names in one
+    query, so only new or renamed devices are written, in a single bulk upsert. Returns the number of
+    rows written.
+    """
+    detected: dict[str, str] = {}
+    for device in devices:
+        address = (device.address or "").strip().lower()
+        if address:
+            detected[address] = (device.name or "").strip()
+    if not detected:
+        return 0
+
+    stored = dict(
+        H5075DeviceAlias.objects.filter(address__in=list(detected)).values_list("address", "detected_name")
+    )
+    now = timezone.now()
+    changed = [
+        H5075DeviceAlias(address=address, detected_name=detected_name, updated_at=now)
+        for address, detected_name in sorted(detected.items())
+        if stored.get(address) != detected_name
+    ]
+    if changed:
+        H5075DeviceAlias.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["address"],
+            update_fields=["detected_name", "updated_at"],
+        )
+        invalidate_history_cache(row.address for row in changed)
+    return len(changed)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Collection
+
+from app.govee_ble import H5075Reading, parse_h5075_manufacturer_data
+from app.models import H5075DeviceAlias
+
+
+AdvertisementHandler = Callable[[object, object], bool]
+
+
+def expected_addresses(mac: str, full_scan: bool) -> list[str]:
+    """Addresses a scan may stop early for: ``--mac``, or every known device; none with ``--full-scan``."""
+    if full_scan:
+        return []
+    if mac:
+        return [mac]
+    return [address for address in H5075DeviceAlias.objects.values_list("address", flat=True) if address]
+
+
+def matching_local_name(device: object, advertisement: object, mac: str = "", name_contains: str = "") -> str | None:
+    """The advertised name when the device passes the usual ``--mac``/``--name-contains`` filters, else None."""
+    if mac and device.address.lower() != mac:
+        return None
+
+    local_name = (advertisement.local_name or device.name or "").strip()
+    if not mac and name_contains and name_contains.lower() not in local_name.lower():
+        return None
+    return local_name
+
+
+def parse_h5075_readings(
+    device: object, advertisement: object, mac: str = "", name_contains: str = ""
+) -> list[H5075Reading]:
+    """Decode the H5075 readings in one advertisement, applying the usual ``--mac``/``--name-contains`` filters."""
+    local_name = matching_local_name(device, advertisement, mac=mac, name_contains=name_contains)
+    if local_name is None:
+        return []
+
+    readings: list[H5075Reading] = []
+    for manufacturer_id, data in advertisement.manufacturer_data.items():
+        parsed = parse_h5075_manufacturer_data(
+            address=device.address,
+            local_name=local_name,
+            manufacturer_id=manufacturer_id,
+            data=data,
+            rssi=advertisement.rssi,
+        )
+        if parsed is not None:
+            readings.append(parsed)
+    return readings
+
+
+async def scan_until_seen(timeout: float, handle: AdvertisementHandler, expected: Collection[str] = ()) -> set[str]:
+    """Scan for up to ``timeout`` seconds, stopping early once every expected address has been handled.
+
+    ``handle(device, advertisement)`` is called for every advertisement and returns True when it produced a
+    valid reading. Without ``expected`` addresses the scan always runs for the full timeout. Returns the
+    lower-cased addresses that produced a valid reading.
+    """
+    from bleak import BleakScanner
+
+    pending = {address.lower() for address in expected if address}
+    seen: set[str] = set()
+    complete = asyncio.Event()
+
+    def on_detection(device: object, advertisement: object) -> None:
+        if not handle(device, advertisement):
+            return
+
+        address = device.address.lower()
+        seen.add(address)
+        pending.discard(address)
+        if expected and not pending:
+            complete.set()
+
+    scanner = BleakScanner(detection_callback=on_detection)
+    await scanner.start()
+    try:
+        await asyncio.wait_for(complete.wait(), timeout=timeout)
+    except TimeoutError:
+        pass
+    finally:
+        await scanner.stop()
+
+    return seen
+
+
+async def scan_until_stopped(
+    handle: Callable[[object, object], object], should_stop: Callable[[], bool], poll_interval: float = 0.5
+) -> None:
+    """Keep one scanner open, feeding every advertisement to ``handle`` until ``should_stop()`` returns True."""
+    from bleak import BleakScanner
+
+    scanner = BleakScanner(detection_callback=handle)
+    await scanner.start()
+    try:
+        while not should_stop():
+            await asyncio.sleep(poll_interval)
+    finally:
+        await scanner.stop()
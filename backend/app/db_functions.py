@@ -0,0 +1,26 @@
+from django.db import NotSupportedError, models
+from django.db.models import Func, Value
+
+
+class EpochSeconds(Func):
+    """Unix epoch seconds of a datetime expression, computed by the database (SQLite only)."""
+
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"EpochSeconds is not implemented for the {connection.vendor} backend.")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # The format string goes in as a parameter: the sqlite backend rewrites a literal %s into a placeholder.
+        strftime = Func(Value("%s"), *self.get_source_expressions(), function="strftime")
+        return Func(strftime, template="CAST(%(expressions)s AS INTEGER)").as_sql(compiler, connection, **extra_context)
+
+
+class BucketEpoch(Func):
+    """Floor a datetime expression to the start of its ``bucket_seconds`` window, as epoch seconds."""
+
+    template = "((%(expressions)s) / %(bucket_seconds)d) * %(bucket_seconds)d"
+    output_field = models.BigIntegerField()
+
+    def __init__(self, expression, bucket_seconds: int, **extra):
+        super().__init__(EpochSeconds(expression), bucket_seconds=int(bucket_seconds), **extra)
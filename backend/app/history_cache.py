@@ -0,0 +1,104 @@
+"""Server-side cache of rendered ``/api/history/`` responses.
+
+Responses are keyed by the normalised query parameters (the view includes its ETag, so any write that
+moves the watermark misses the cache) plus a generation token for the scope they read:
+the requested address, or every device for unfiltered queries. Writers call
+:func:`invalidate_history_cache` with the addresses they touched; once their transaction commits the
+matching generations get new tokens, so every cached response that could include those addresses is
+never looked up again and simply expires.
+
+The generations live in the same cache as the responses. With a file-based cache shared by the web
+workers and the ingest commands, invalidation reaches every process.
+
+Writers that delete or rewrite stored history rows (compaction, rollup rebuilds, admin edits) also call
+:func:`bump_history_versions` inside their transaction. Inserts already move the newest ``created_at``;
+the per-device counters feed the ``/api/history/`` ETag so that clients revalidating with
+``If-None-Match`` also see deletes and edits.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+from app.models import H5075HistoryVersion
+
+
+KEY_PREFIX = "h5075:history"
+ALL_DEVICES = "*"
+EVERYTHING = "!"
+
+
+def _generation_key(scope: str) -> str:
+    return f"{KEY_PREFIX}:generation:{scope}"
+
+
+def _generations(scopes: list[str]) -> list[str]:
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # A random token rather than a counter: a generation evicted from the cache can never come
+            # back with a value that old responses were stored under.
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def history_cache_key(params: dict[str, object]) -> str:
+    address = str(params.get("address") or "").strip().lower()
+    generations = _generations([EVERYTHING, address or ALL_DEVICES])
+    normalized = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.md5(f"{normalized}|{'|'.join(generations)}".encode()).hexdigest()
+    return f"{KEY_PREFIX}:response:{digest}"
+
+
+def get_cached_history(key: str) -> HttpResponse | None:
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def cache_history(key: str, response: HttpResponse) -> None:
+    if response.status_code == 200:
+        cache.set(key, (response.content, response["Content-Type"]), timeout=settings.HISTORY_CACHE_TIMEOUT)
+
+
+def invalidate_history_cache(addresses: Iterable[str] | None = None) -> None:
+    """Orphan cached responses for ``addresses`` (every response when ``None``) after the current commit."""
+    if addresses is None:
+        scopes = [EVERYTHING]
+    else:
+        scopes = sorted({(address or "").strip().lower() for address in addresses if address})
+        if not scopes:
+            return
+        scopes.append(ALL_DEVICES)
+
+    transaction.on_commit(
+        lambda: cache.set_many({_generation_key(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+    )
+
+
+def bump_history_versions(addresses: Iterable[str] | None = None) -> None:
+    """Count a write to the stored history of ``addresses`` (every known device when ``None``)."""
+    versions = H5075HistoryVersion.objects.all()
+    if addresses is not None:
+        address_keys = sorted({(address or "").strip().lower() for address in addresses if address})
+        if not address_keys:
+            return
+        H5075HistoryVersion.objects.bulk_create(
+            [H5075HistoryVersion(address=address_key) for address_key in address_keys], ignore_conflicts=True
+        )
+        versions = versions.filter(address__in=address_keys)
+    versions.update(version=F("version") + 1, updated_at=timezone.now())
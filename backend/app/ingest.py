@@ -0,0 +1,449 @@
+"""Composable ingest pipeline for live H5075 readings.
+
+A pipeline is an ordered list of stages; each stage takes a batch and returns the batch for the next
+stage. The live commands assemble the same building blocks::
+
+    source (scanner) -> decode -> coalesce -> enrich -> dedupe -> store
+
+and can swap or drop stages, e.g. ``read_h5075`` decodes while scanning and skips coalescing, and
+``read_h5075_dump`` swaps in the snapshot variants of enrich, dedupe and store.
+Every stage records how many items went in and out and how long it took.
+"""
+
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from app.aliases import get_name_map, upsert_detected_names
+from app.ble import parse_h5075_readings
+from app.govee_ble import H5075AdvertisementData, H5075Reading
+from app.live_buffer import LatestReadingBuffer
+from app.live_events import notify_stored
+from app.models import H5075AdvertisementSnapshot, H5075DeviceAlias, H5075Measurement
+from app.rollups import rollup_live
+
+
+# Temperature and humidity in integer hundredths (the sensor's resolution), battery %, error flag.
+ReadingValues = tuple[int, int, int, bool]
+
+
+@dataclass(slots=True)
+class StageMetrics:
+    received: int = 0
+    emitted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.received - self.emitted)
+
+
+class Stage(ABC):
+    """One step of an :class:`IngestPipeline`.
+
+    ``process`` handles a batch and may hold items back (the coalescing stage does); ``flush`` releases
+    anything still held when the pipeline shuts down.
+    """
+
+    name = "stage"
+
+    @abstractmethod
+    def process(self, items: list) -> list: ...
+
+    def flush(self) -> list:
+        return []
+
+
+class FunctionStage(Stage):
+    def __init__(self, name: str, func: Callable[[list], list]) -> None:
+        self.name = name
+        self.func = func
+
+    def process(self, items: list) -> list:
+        return self.func(items) if items else []
+
+
+class IngestPipeline:
+    def __init__(self, stages: Sequence[Stage]) -> None:
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+
+        self.stages = list(stages)
+        self.metrics = {stage.name: StageMetrics() for stage in self.stages}
+
+    def __getitem__(self, name: str) -> Stage:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def run(self, items: Iterable) -> list:
+        """Push a batch through every stage; an empty batch still gives time-based stages a chance to emit."""
+        return self._run(list(items), flush=False)
+
+    def flush(self) -> list:
+        return self._run([], flush=True)
+
+    def format_metrics(self) -> str:
+        return ", ".join(
+            f"{name} {metrics.received}->{metrics.emitted} in {metrics.seconds * 1000:.1f}ms"
+            for name, metrics in self.metrics.items()
+        )
+
+    def _run(self, items: list, flush: bool) -> list:
+        for stage in self.stages:
+            metrics = self.metrics[stage.name]
+            started = time.perf_counter()
+            received = len(items)
+            items = stage.process(items)
+            if flush:
+                items = items + stage.flush()
+            metrics.seconds += time.perf_counter() - started
+            metrics.received += received
+            metrics.emitted += len(items)
+        return items
+
+
+class DecodeAdvertisements(Stage):
+    """``(device, advertisement)`` pairs from a scanner -> :class:`H5075Reading`."""
+
+    name = "decode"
+
+    def __init__(self, mac: str = "", name_contains: str = "") -> None:
+        self.mac = mac
+        self.name_contains = name_contains
+
+    def process(self, items: list) -> list:
+        readings: list[H5075Reading] = []
+        for device, advertisement in items:
+            readings.extend(
+                parse_h5075_readings(device, advertisement, mac=self.mac, name_contains=self.name_contains)
+            )
+        return readings
+
+
+class CoalesceLatest(Stage):
+    """Hold readings in a :class:`LatestReadingBuffer` and release them as one batch when it is due."""
+
+    name = "coalesce"
+
+    def __init__(self, max_size: int = 100, max_age: float = 5.0) -> None:
+        self.buffer = LatestReadingBuffer(max_size=max_size, max_age=max_age)
+
+    def process(self, items: list) -> list:
+        for reading in items:
+            self.buffer.add(reading)
+        return self.buffer.drain() if self.buffer.should_flush() else []
+
+    def flush(self) -> list:
+        return self.buffer.drain()
+
+
+class AttachNames(Stage):
+    """Readings -> unsaved :class:`H5075Measurement` rows carrying the device's display name.
+
+    Detected names are upserted for every reading. With ``refresh_seconds`` the display names are
+    cached and reloaded periodically, so long-running collectors pick up alias edits without a
+    lookup per batch.
+    """
+
+    name = "enrich"
+
+    def __init__(self, refresh_seconds: float | None = None) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.names: dict[str, str] = {}
+        self._detected: dict[str, str] = {}
+        self._loaded_at = time.monotonic()
+
+    def process(self, items: list) -> list:
+        if not items:
+            return []
+
+        renamed = [item for item in items if self._detected.get(item.address.lower()) != item.name]
+        if renamed:
+            upsert_detected_names(renamed)
+            self._detected.update((item.address.lower(), item.name) for item in renamed)
+
+        addresses = {item.address.lower() for item in items}
+        stale = self.refresh_seconds is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+        if stale:
+            self.names.update(get_name_map(addresses | set(self.names)))
+            self._loaded_at = time.monotonic()
+        else:
+            missing = addresses - set(self.names)
+            if missing:
+                self.names.update(get_name_map(missing))
+
+        return [self.build_row(item, self.names.get(item.address.lower(), item.name)) for item in items]
+
+    def build_row(self, item: H5075Reading, name: str) -> H5075Measurement:
+        return H5075Measurement(
+            address=item.address.lower(),
+            name=name,
+            temperature_c=item.temperature_c,
+            humidity_pct=item.humidity_pct,
+            battery_pct=item.battery_pct,
+            error=item.error,
+            rssi=item.rssi,
+        )
+
+
+class AttachSnapshotNames(AttachNames):
+    """Decoded advertisements -> unsaved :class:`H5075AdvertisementSnapshot` rows."""
+
+    def build_row(self, item: H5075AdvertisementData, name: str) -> H5075AdvertisementSnapshot:
+        return H5075AdvertisementSnapshot(
+            address=item.address.lower(),
+            name=name,
+            manufacturer_id=item.manufacturer_id,
+            payload_hex=item.payload_hex,
+            service_uuids=list(item.service_uuids),
+            temperature_c=item.temperature_c,
+            humidity_pct=item.humidity_pct,
+            battery_pct=item.battery_pct,
+            error=item.error,
+            rssi=item.rssi,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ChangePolicy:
+    """When a live reading is worth storing.
+
+    A reading is stored when temperature, humidity or battery moved by more than their deadband since the
+    last *stored* reading of that device, when its error flag flipped, or when ``heartbeat_seconds`` have
+    passed since that reading (0 disables the heartbeat). The zero defaults store every change.
+
+    The command-line flags build the default policy; the deadband fields of a device's
+    :class:`H5075DeviceAlias` override it for that device.
+    """
+
+    OVERRIDES = {
+        "temperature_deadband": "temperature_c",
+        "humidity_deadband": "humidity_pct",
+        "battery_deadband": "battery_pct",
+        "heartbeat_seconds": "heartbeat_seconds",
+    }
+
+    temperature_c: float = 0.0
+    humidity_pct: float = 0.0
+    battery_pct: int = 0
+    heartbeat_seconds: float = 0.0
+    _temperature_hundredths: int = field(init=False, repr=False, compare=False)
+    _humidity_hundredths: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_temperature_hundredths", hundredths(self.temperature_c))
+        object.__setattr__(self, "_humidity_hundredths", hundredths(self.humidity_pct))
+
+    def is_change(self, previous: ReadingValues, current: ReadingValues) -> bool:
+        return (
+            abs(current[0] - previous[0]) > self._temperature_hundredths
+            or abs(current[1] - previous[1]) > self._humidity_hundredths
+            or abs(current[2] - previous[2]) > self.battery_pct
+            or current[3] != previous[3]
+        )
+
+    def heartbeat_due(self, stored_at: datetime, now: datetime) -> bool:
+        return bool(self.heartbeat_seconds) and (now - stored_at).total_seconds() >= self.heartbeat_seconds
+
+    def for_device(self, alias: H5075DeviceAlias | None) -> ChangePolicy:
+        if alias is None:
+            return self
+        overrides = {field: getattr(alias, column) for column, field in self.OVERRIDES.items()}
+        return replace(self, **{field: value for field, value in overrides.items() if value is not None})
+
+
+class DropUnchanged(Stage):
+    """Drop rows that the :class:`ChangePolicy` does not consider a change from the device's last stored row.
+
+    The last stored values are loaded once per device and then tracked in memory, so a long-running
+    collector compares against its own writes without querying again. ``policy`` is the default; devices
+    with deadbands on their alias use those instead, reloaded every ``refresh_seconds`` like the names in
+    :class:`AttachNames`.
+    """
+
+    name = "dedupe"
+
+    def __init__(self, policy: ChangePolicy | None = None, refresh_seconds: float | None = None) -> None:
+        self.policy = policy or ChangePolicy()
+        self.refresh_seconds = refresh_seconds
+        self.last_stored: dict[str, tuple[ReadingValues, datetime] | None] = {}
+        self.policies: dict[str, ChangePolicy] = {}
+        self._loaded_at = time.monotonic()
+
+    def process(self, items: list) -> list:
+        unseen = {item.address for item in items if item.address.lower() not in self.last_stored}
+        if unseen:
+            latest = latest_live_rows(unseen)
+            for address in unseen:
+                row = latest.get(address.lower())
+                self.last_stored[address.lower()] = None if row is None else (reading_values(row), row.created_at)
+
+        stale = self.refresh_seconds is not None and time.monotonic() - self._loaded_at >= self.refresh_seconds
+        missing = set(self.last_stored) if stale else set(self.last_stored) - set(self.policies)
+        if missing:
+            self._load_policies(missing)
+
+        now = timezone.now()
+        changed = []
+        for item in items:
+            address = item.address.lower()
+            values = reading_values(item)
+            previous = self.last_stored[address]
+            if previous is not None:
+                policy = self.policies[address]
+                previous_values, stored_at = previous
+                if not policy.is_change(previous_values, values) and not policy.heartbeat_due(stored_at, now):
+                    continue
+            self.last_stored[address] = (values, now)
+            changed.append(item)
+        return changed
+
+    def _load_policies(self, addresses: set[str]) -> None:
+        aliases = {alias.address: alias for alias in H5075DeviceAlias.objects.filter(address__in=addresses)}
+        for address in addresses:
+            self.policies[address] = self.policy.for_device(aliases.get(address))
+        self._loaded_at = time.monotonic()
+
+
+class StoreMeasurements(Stage):
+    """Batch sink: one transaction per batch inserting the rows and folding them into the live rollups.
+
+    After the commit, connected ``/api/live/`` clients are notified.
+    """
+
+    name = "store"
+
+    def process(self, items: list) -> list:
+        if not items:
+            return []
+
+        with transaction.atomic():
+            H5075Measurement.objects.bulk_create(items)
+            rollup_live(items)
+            notify_stored()
+        return items
+
+
+class DropStoredSnapshots(Stage):
+    """Drop snapshots whose payload is already stored for the device, checked with one query per batch."""
+
+    name = "dedupe"
+
+    def process(self, items: list) -> list:
+        if not items:
+            return []
+
+        stored = set(
+            H5075AdvertisementSnapshot.objects.filter(
+                address__in={item.address for item in items}, payload_hex__in={item.payload_hex for item in items}
+            ).values_list("address", "manufacturer_id", "payload_hex")
+        )
+        fresh = []
+        for item in items:
+            key = (item.address, item.manufacturer_id, item.payload_hex)
+            if key not in stored:
+                stored.add(key)
+                fresh.append(item)
+        return fresh
+
+
+class StoreSnapshots(Stage):
+    name = "store"
+
+    def process(self, items: list) -> list:
+        if items:
+            H5075AdvertisementSnapshot.objects.bulk_create(items, ignore_conflicts=True)
+        return items
+
+
+def hundredths(value: float) -> int:
+    return round(float(value) * 100)
+
+
+def reading_values(item: H5075Reading | H5075Measurement) -> ReadingValues:
+    return (
+        hundredths(item.temperature_c),
+        hundredths(item.humidity_pct),
+        item.battery_pct,
+        item.error,
+    )
+
+
+def latest_live_values(addresses: Iterable[str]) -> dict[str, ReadingValues]:
+    """Values of the newest stored measurement per lower-cased address, fetched in a single query."""
+    return {address_key: reading_values(row) for address_key, row in latest_live_rows(addresses).items()}
+
+
+def latest_live_rows(addresses: Iterable[str]) -> dict[str, H5075Measurement]:
+    """Newest stored measurement per lower-cased address, fetched in a single query.
+
+    Each address is one ``ORDER BY created_at DESC LIMIT 1`` seek on the ``(address, created_at)`` index,
+    so the cost depends on the number of addresses, not on how many rows each device has stored.
+    """
+    address_keys = sorted({address.strip().lower() for address in addresses if address})
+    if not address_keys:
+        return {}
+
+    newest = Q()
+    for address_key in address_keys:
+        latest_id = H5075Measurement.objects.filter(address=address_key).order_by("-created_at", "-id").values("id")[:1]
+        newest |= Q(id=Subquery(latest_id))
+    return {row.address: row for row in H5075Measurement.objects.filter(newest).order_by()}
+
+
+def add_change_policy_arguments(parser) -> None:
+    parser.add_argument(
+        "--temperature-deadband",
+        type=float,
+        default=0.0,
+        help="Only store a reading when temperature moved more than this many °C since the last stored one.",
+    )
+    parser.add_argument(
+        "--humidity-deadband",
+        type=float,
+        default=0.0,
+        help="Only store a reading when humidity moved more than this many percentage points.",
+    )
+    parser.add_argument(
+        "--battery-deadband",
+        type=int,
+        default=0,
+        help="Only store a reading when battery moved more than this many percentage points.",
+    )
+    parser.add_argument(
+        "--heartbeat",
+        type=float,
+        default=0.0,
+        help="Store a reading at least this often per device in seconds, even when nothing changed (0 disables).",
+    )
+
+
+def change_policy_from_options(options: dict) -> ChangePolicy:
+    values = {
+        "--temperature-deadband": options["temperature_deadband"],
+        "--humidity-deadband": options["humidity_deadband"],
+        "--battery-deadband": options["battery_deadband"],
+        "--heartbeat": options["heartbeat"],
+    }
+    for flag, value in values.items():
+        if value < 0:
+            raise CommandError(f"{flag} must be >= 0")
+
+    return ChangePolicy(
+        temperature_c=float(options["temperature_deadband"]),
+        humidity_pct=float(options["humidity_deadband"]),
+        battery_pct=int(options["battery_deadband"]),
+        heartbeat_seconds=float(options["heartbeat"]),
+    )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+from app.govee_ble import H5075Reading
+
+
+class LatestReadingBuffer:
+    """Write-behind buffer that keeps only the latest live reading per device until it is flushed.
+
+    Flushing is due once ``max_size`` devices are pending or the oldest pending reading has waited
+    ``max_age`` seconds, so a burst of advertisements turns into one batched write.
+    """
+
+    def __init__(self, max_size: int = 100, max_age: float = 5.0) -> None:
+        self.max_size = max(1, int(max_size))
+        self.max_age = max(0.0, float(max_age))
+        self.coalesced = 0
+        self._pending: dict[str, H5075Reading] = {}
+        self._oldest: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, reading: H5075Reading) -> None:
+        address = reading.address.lower()
+        if address in self._pending:
+            self.coalesced += 1
+        elif self._oldest is None:
+            self._oldest = time.monotonic()
+        self._pending[address] = reading
+
+    def should_flush(self) -> bool:
+        if not self._pending:
+            return False
+        return len(self._pending) >= self.max_size or time.monotonic() - self._oldest >= self.max_age
+
+    def drain(self) -> list[H5075Reading]:
+        readings = list(self._pending.values())
+        self._pending = {}
+        self._oldest = None
+        return readings
@@ -0,0 +1,169 @@
+"""Fan-out of newly stored readings to Server-Sent Events clients.
+
+Each web process runs a single watcher task while at least one client is connected. The watcher reads
+rows stored since its last id watermarks (one indexed query per table, however many clients listen) and
+puts them on every subscriber's queue.
+
+With ``LIVE_NOTIFY_PATH`` set, the writers (live collector, history sync) rewrite that small file after
+each commit and the watcher only queries SQLite when its content changed. Without it the watcher queries
+every ``LIVE_POLL_INTERVAL`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+
+from app.models import H5075HistoricalMeasurement, H5075Measurement
+
+
+logger = logging.getLogger(__name__)
+
+
+def notify_stored() -> None:
+    """Tell the web processes that rows were stored, once the current transaction commits."""
+    path = settings.LIVE_NOTIFY_PATH
+    if path:
+        transaction.on_commit(lambda: _write_token(Path(path)))
+
+
+def _write_token(path: Path) -> None:
+    # Unique content rather than a touch: two writes within one mtime tick still look different.
+    temporary = path.with_name(f"{path.name}.{os.getpid()}")
+    try:
+        temporary.write_text(str(time.time_ns()))
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+
+def _read_token(path: Path) -> str:
+    try:
+        return path.read_text()
+    except OSError:
+        return ""
+
+
+def format_event(event: str, event_id: str, payload: dict[str, object]) -> str:
+    return f"event: {event}\nid: {event_id}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+class LiveBroadcaster:
+    """In-process publish/subscribe of SSE-formatted events for newly stored rows.
+
+    Subscribers that fall ``max_queue`` events behind lose their oldest events instead of stalling
+    the others.
+    """
+
+    FETCH_LIMIT = 500
+
+    def __init__(self, notify_path: str | None = None, poll_interval: float | None = None, max_queue: int = 256) -> None:
+        self.notify_path = settings.LIVE_NOTIFY_PATH if notify_path is None else notify_path
+        self.poll_interval = settings.LIVE_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.max_queue = max_queue
+        self.subscribers: set[asyncio.Queue[str]] = set()
+        self.last_live_id = 0
+        self.last_history_id = 0
+        self._watcher: asyncio.Task | None = None
+        self._backlog = False
+
+    async def subscribe(self) -> asyncio.Queue[str]:
+        if self._watcher is None or self._watcher.done():
+            await sync_to_async(self._load_watermarks)()
+            self._watcher = asyncio.create_task(self._watch())
+
+        subscriber: asyncio.Queue[str] = asyncio.Queue(maxsize=self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: asyncio.Queue[str]) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, message: str) -> None:
+        for subscriber in self.subscribers:
+            if subscriber.full():
+                subscriber.get_nowait()
+            subscriber.put_nowait(message)
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        token = _read_token(Path(self.notify_path)) if self.notify_path else ""
+        while self.subscribers:
+            await asyncio.sleep(self.poll_interval)
+            if self.notify_path and not self._backlog:
+                current = _read_token(Path(self.notify_path))
+                if current == token:
+                    continue
+                token = current
+
+            try:
+                messages = await sync_to_async(self._fetch_new)()
+            except DatabaseError:
+                # E.g. "database is locked" past the busy timeout; the watermarks are unchanged, so retry next tick.
+                logger.exception("Reading new rows for live events failed")
+                self._backlog = True
+                continue
+            for message in messages:
+                self.publish(message)
+
+    def _load_watermarks(self) -> None:
+        self.last_live_id = H5075Measurement.objects.aggregate(latest=Max("id"))["latest"] or 0
+        self.last_history_id = H5075HistoricalMeasurement.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+    def _fetch_new(self) -> list[str]:
+        messages: list[str] = []
+
+        live_rows = list(H5075Measurement.objects.filter(id__gt=self.last_live_id).order_by("id")[: self.FETCH_LIMIT])
+        for row in live_rows:
+            payload = {
+                "address": row.address,
+                "name": row.name,
+                "created_at": row.created_at.isoformat(),
+                "temperature_c": row.temperature_c,
+                "humidity_pct": row.humidity_pct,
+                "battery_pct": row.battery_pct,
+                "error": row.error,
+                "rssi": row.rssi,
+            }
+            messages.append(format_event("measurement", f"live-{row.id}", payload))
+        if live_rows:
+            self.last_live_id = live_rows[-1].id
+
+        history_rows = list(
+            H5075HistoricalMeasurement.objects.filter(id__gt=self.last_history_id).order_by("id")[: self.FETCH_LIMIT]
+        )
+        for row in history_rows:
+            payload = {
+                "address": row.address,
+                "name": row.name,
+                "measured_at": row.measured_at.isoformat(),
+                "temperature_c": row.temperature_c,
+                "humidity_pct": row.humidity_pct,
+            }
+            messages.append(format_event("history", f"history-{row.id}", payload))
+        if history_rows:
+            self.last_history_id = history_rows[-1].id
+
+        # A full page (e.g. a history sync backfill) means more rows are waiting; fetch again next tick.
+        self._backlog = len(live_rows) == self.FETCH_LIMIT or len(history_rows) == self.FETCH_LIMIT
+        return messages
+
+
+live_broadcaster = LiveBroadcaster()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.ble import scan_until_stopped
+from app.ingest import (
+    AttachNames,
+    CoalesceLatest,
+    DecodeAdvertisements,
+    DropUnchanged,
+    IngestPipeline,
+    StoreMeasurements,
+    add_change_policy_arguments,
+    change_policy_from_options,
+)
+from app.models import H5075Measurement
+
+
+_SCANNER_STOPPED = object()
+
+
+class Command(BaseCommand):
+    help = "Keep a Bluetooth scanner open and store live H5075 readings as advertisements arrive."
+
+    POLL_INTERVAL_SECONDS = 0.5
+    NAME_REFRESH_SECONDS = 60.0
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--mac", type=str, default="", help="Only collect this H5075 MAC address (optional).")
+        parser.add_argument(
+            "--name-contains",
+            type=str,
+            default="H5075",
+            help="Filter by device name substring when --mac is not provided.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=0.0,
+            help="Stop after this many seconds. Default 0 runs until interrupted.",
+        )
+        parser.add_argument(
+            "--restart-delay",
+            type=float,
+            default=5.0,
+            help="Seconds to wait before reopening the scanner after a Bluetooth error.",
+        )
+        parser.add_argument(
+            "--flush-interval",
+            type=float,
+            default=5.0,
+            help="Write buffered readings at least this often, in seconds.",
+        )
+        parser.add_argument(
+            "--flush-size",
+            type=int,
+            default=100,
+            help="Write buffered readings as soon as this many devices are pending.",
+        )
+        add_change_policy_arguments(parser)
+
+    def handle(self, *args, **options) -> None:
+        duration = float(options["duration"])
+        restart_delay = float(options["restart_delay"])
+        if duration < 0:
+            raise CommandError("--duration must be >= 0")
+        if restart_delay < 0:
+            raise CommandError("--restart-delay must be >= 0")
+        if options["flush_interval"] < 0:
+            raise CommandError("--flush-interval must be >= 0")
+        if options["flush_size"] < 1:
+            raise CommandError("--flush-size must be >= 1")
+        change_policy = change_policy_from_options(options)
+
+        advertisements: queue.Queue[object] = queue.Queue()
+        stop = threading.Event()
+
+        # Same split as read_h5075_history: the scanner's event loop only enqueues advertisements,
+        # this thread owns the database connection and runs the ingest pipeline.
+        scanner = threading.Thread(
+            target=self._run_scanner,
+            kwargs={"advertisements": advertisements, "stop": stop, "restart_delay": restart_delay},
+            name="h5075-collector-ble",
+            daemon=True,
+        )
+        pipeline = IngestPipeline(
+            [
+                DecodeAdvertisements(
+                    mac=(options["mac"] or "").strip().lower(),
+                    name_contains=(options["name_contains"] or "").strip(),
+                ),
+                CoalesceLatest(max_size=options["flush_size"], max_age=options["flush_interval"]),
+                AttachNames(refresh_seconds=self.NAME_REFRESH_SECONDS),
+                DropUnchanged(change_policy, refresh_seconds=self.NAME_REFRESH_SECONDS),
+                StoreMeasurements(),
+            ]
+        )
+
+        previous_sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        scanner.start()
+        self.stderr.write("Collecting H5075 advertisements, press Ctrl+C to stop")
+        deadline = time.monotonic() + duration if duration else None
+        try:
+            while not stop.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                try:
+                    item = advertisements.get(timeout=self.POLL_INTERVAL_SECONDS)
+                except queue.Empty:
+                    item = None
+
+                if item is _SCANNER_STOPPED:
+                    break
+                self._report(pipeline.run([item] if item is not None else []))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            scanner.join()
+            signal.signal(signal.SIGTERM, previous_sigterm)
+
+        self._report(pipeline.flush())
+        self.stderr.write(
+            f"Saved {pipeline.metrics['store'].emitted} reading(s), "
+            f"skipped {pipeline.metrics['dedupe'].dropped} duplicate(s), "
+            f"coalesced {pipeline['coalesce'].buffer.coalesced} advertisement(s)"
+        )
+        self.stderr.write(f"Pipeline: {pipeline.format_metrics()}")
+
+    def _run_scanner(self, advertisements: queue.Queue[object], stop: threading.Event, restart_delay: float) -> None:
+        def handle(device: object, advertisement: object) -> None:
+            advertisements.put((device, advertisement))
+
+        try:
+            while not stop.is_set():
+                try:
+                    asyncio.run(scan_until_stopped(handle, stop.is_set, poll_interval=self.POLL_INTERVAL_SECONDS))
+                except Exception as exc:
+                    if stop.is_set():
+                        break
+                    self.stderr.write(f"Bluetooth scanner failed: {exc}; restarting in {restart_delay:g}s")
+                    stop.wait(restart_delay)
+        finally:
+            advertisements.put(_SCANNER_STOPPED)
+
+    def _report(self, rows: list[H5075Measurement]) -> None:
+        for row in rows:
+            line = (
+                f"{row.name} [{row.address}] "
+                f"temp={row.temperature_c:.1f}°C humidity={row.humidity_pct:.1f}% "
+                f"battery={row.battery_pct}% rssi={row.rssi}"
+            )
+            if row.error:
+                line += " error=true"
+            self.stdout.write(line)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import H5075HistoricalMeasurement, H5075MeasurementRollup
+from app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Snap stored history timestamps to the minute grid and merge near-duplicate records."
+
+    BATCH_SIZE = 500
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--mac", type=str, default="", help="Only compact records of this MAC address.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+
+    def handle(self, *args, **options) -> None:
+        mac = (options["mac"] or "").strip()
+
+        queryset = H5075HistoricalMeasurement.objects.order_by("address", "measured_at", "id")
+        if mac:
+            queryset = queryset.filter(address=mac.lower())
+
+        to_delete: list[int] = []
+        to_snap: list[tuple[int, datetime]] = []
+        affected: set[str] = set()
+
+        group: list[tuple[int, datetime]] = []
+        group_key: tuple[str, datetime] | None = None
+
+        for row_id, address, measured_at in queryset.values_list("id", "address", "measured_at").iterator(chunk_size=2000):
+            key = (address, measured_at.replace(second=0, microsecond=0))
+            if key != group_key:
+                self._plan_group(group_key, group, to_delete, to_snap, affected)
+                group_key = key
+                group = []
+            group.append((row_id, measured_at))
+
+        self._plan_group(group_key, group, to_delete, to_snap, affected)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would merge {len(to_delete)} duplicate(s) and snap {len(to_snap)} timestamp(s) "
+                f"across {len(affected)} device(s)"
+            )
+            return
+
+        with transaction.atomic():
+            for index in range(0, len(to_delete), self.BATCH_SIZE):
+                H5075HistoricalMeasurement.objects.filter(id__in=to_delete[index : index + self.BATCH_SIZE]).delete()
+
+            for index in range(0, len(to_snap), self.BATCH_SIZE):
+                H5075HistoricalMeasurement.objects.bulk_update(
+                    [
+                        H5075HistoricalMeasurement(id=row_id, measured_at=minute)
+                        for row_id, minute in to_snap[index : index + self.BATCH_SIZE]
+                    ],
+                    ["measured_at"],
+                )
+
+            if affected:
+                rebuild_rollups(H5075MeasurementRollup.SOURCE_HISTORY, addresses=affected)
+
+        self.stdout.write(
+            f"Merged {len(to_delete)} duplicate(s) and snapped {len(to_snap)} timestamp(s) "
+            f"across {len(affected)} device(s)"
+        )
+
+    @staticmethod
+    def _plan_group(
+        key: tuple[str, datetime] | None,
+        group: list[tuple[int, datetime]],
+        to_delete: list[int],
+        to_snap: list[tuple[int, datetime]],
+        affected: set[str],
+    ) -> None:
+        if key is None or not group:
+            return
+
+        address, minute = key
+        # Keep a row that already sits on the grid, otherwise the earliest timestamp within that minute.
+        keep_id, keep_measured_at = next((item for item in group if item[1] == minute), group[0])
+        duplicates = [row_id for row_id, _ in group if row_id != keep_id]
+
+        if not duplicates and keep_measured_at == minute:
+            return
+
+        to_delete.extend(duplicates)
+        if keep_measured_at != minute:
+            to_snap.append((keep_id, minute))
+        affected.add(address)
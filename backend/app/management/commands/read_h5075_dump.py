@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import json
+from collections.abc import Collection
 from dataclasses import asdict
 
 from django.core.management.base import BaseCommand, CommandError
 
+from app.ble import expected_addresses, matching_local_name, scan_until_seen
 from app.govee_ble import H5075AdvertisementData, parse_h5075_advertisement_data
-from app.models import H5075AdvertisementSnapshot, H5075DeviceAlias
+from app.ingest import AttachSnapshotNames, DropStoredSnapshots, IngestPipeline, StoreSnapshots
 
 
 class Command(BaseCommand):
@@ -22,15 +24,22 @@ class Command(BaseCommand):
             help="Filter by device name substring when --mac is not provided.",
         )
         parser.add_argument("--timeout", type=float, default=10.0, help="BLE scan timeout in seconds.")
+        parser.add_argument(
+            "--full-scan",
+            action="store_true",
+            help="Always scan for the full timeout instead of stopping once every expected device reported.",
+        )
         parser.add_argument("--json", action="store_true", help="Output JSON.")
 
     def handle(self, *args, **options) -> None:
+        mac = (options["mac"] or "").strip().lower()
         try:
             snapshots = asyncio.run(
                 self._scan(
-                    mac=(options["mac"] or "").strip().lower(),
+                    mac=mac,
                     name_contains=(options["name_contains"] or "").strip(),
                     timeout=float(options["timeout"]),
+                    expected=expected_addresses(mac, full_scan=options["full_scan"]),
                 )
             )
         except RuntimeError as exc:
@@ -40,32 +49,16 @@ class Command(BaseCommand):
             raise CommandError("No H5075 snapshot data found.")
 
         snapshots.sort(key=lambda item: item.rssi if item.rssi is not None else -9999, reverse=True)
-        self._upsert_detected_names(snapshots)
-        name_map = self._get_name_map([item.address for item in snapshots])
-
-        saved = 0
-        skipped = 0
-        for item in snapshots:
-            _, created = H5075AdvertisementSnapshot.objects.get_or_create(
-                address=item.address,
-                manufacturer_id=item.manufacturer_id,
-                payload_hex=item.payload_hex,
-                defaults={
-                    "name": name_map.get(item.address.lower(), item.name),
-                    "service_uuids": list(item.service_uuids),
-                    "temperature_c": item.temperature_c,
-                    "humidity_pct": item.humidity_pct,
-                    "battery_pct": item.battery_pct,
-                    "error": item.error,
-                    "rssi": item.rssi,
-                },
-            )
-            if created:
-                saved += 1
-            else:
-                skipped += 1
+        pipeline = IngestPipeline([AttachSnapshotNames(), DropStoredSnapshots(), StoreSnapshots()])
+        pipeline.run(snapshots)
+        name_map = pipeline["enrich"].names
 
-        self.stderr.write(f"Saved {saved} snapshot(s), skipped {skipped} duplicate(s)")
+        self.stderr.write(
+            f"Saved {pipeline.metrics['store'].emitted} snapshot(s), "
+            f"skipped {pipeline.metrics['dedupe'].dropped} duplicate(s)"
+        )
+        if options["verbosity"] >= 2:
+            self.stderr.write(f"Pipeline: {pipeline.format_metrics()}")
 
         if options["json"]:
             payload = []
@@ -87,21 +80,17 @@ class Command(BaseCommand):
                 line += " error=true"
             self.stdout.write(line)
 
-    async def _scan(self, mac: str, name_contains: str, timeout: float) -> list[H5075AdvertisementData]:
-        from bleak import BleakScanner
+    async def _scan(
+        self, mac: str, name_contains: str, timeout: float, expected: Collection[str] = ()
+    ) -> list[H5075AdvertisementData]:
+        matches: dict[tuple[str, int], H5075AdvertisementData] = {}
 
-        discovered = await BleakScanner.discover(timeout=timeout, return_adv=True)
-        matches: list[H5075AdvertisementData] = []
-
-        for address, (device, advertisement) in discovered.items():
-            device_address = address.lower()
-            if mac and device_address != mac:
-                continue
-
-            local_name = (advertisement.local_name or device.name or "").strip()
-            if not mac and name_contains and name_contains.lower() not in local_name.lower():
-                continue
+        def handle(device: object, advertisement: object) -> bool:
+            local_name = matching_local_name(device, advertisement, mac=mac, name_contains=name_contains)
+            if local_name is None:
+                return False
 
+            parsed_any = False
             for manufacturer_id, data in advertisement.manufacturer_data.items():
                 parsed = parse_h5075_advertisement_data(
                     address=device.address,
@@ -112,31 +101,11 @@ class Command(BaseCommand):
                     service_uuids=advertisement.service_uuids,
                 )
                 if parsed is not None:
-                    matches.append(parsed)
-
-        return matches
+                    # Keep the latest advertisement per device, as BleakScanner.discover did.
+                    matches[(device.address.lower(), manufacturer_id)] = parsed
+                    parsed_any = True
 
-    @staticmethod
-    def _get_name_map(addresses: list[str]) -> dict[str, str]:
-        normalized = sorted({(address or "").strip().lower() for address in addresses if address})
-        if not normalized:
-            return {}
+            return parsed_any
 
-        aliases = H5075DeviceAlias.objects.filter(address__in=normalized)
-        return {item.address.lower(): (item.alias or item.detected_name or item.address) for item in aliases}
-
-    @staticmethod
-    def _upsert_detected_names(snapshots: list[H5075AdvertisementData]) -> None:
-        for item in snapshots:
-            address = (item.address or "").strip().lower()
-            if not address:
-                continue
-
-            detected_name = (item.name or "").strip()
-            alias, _ = H5075DeviceAlias.objects.get_or_create(
-                address=address,
-                defaults={"detected_name": detected_name},
-            )
-            if alias.detected_name != detected_name:
-                alias.detected_name = detected_name
-                alias.save(update_fields=["detected_name", "updated_at"])
+        await scan_until_seen(timeout=timeout, handle=handle, expected=expected)
+        return list(matches.values())
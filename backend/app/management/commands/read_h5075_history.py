@@ -3,24 +3,41 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import math
+import queue
+import threading
+from collections.abc import Callable
 from dataclasses import asdict, dataclass
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
+from app.aliases import get_name_map, upsert_detected_names
 from app.govee_ble import decode_temp_humid
-from app.models import H5075DeviceAlias, H5075HistoricalMeasurement
+from app.history_cache import invalidate_history_cache
+from app.live_events import notify_stored
+from app.models import H5075DeviceAlias, H5075HistoricalMeasurement, H5075Measurement
+from app.rollups import rollup_history
 
 
-@dataclass(frozen=True)
-class HistoryPoint:
+@dataclass(frozen=True, slots=True)
+class HistoryRecord:
     address: str
     name: str
-    measured_at: str
+    measured_at: int
     temperature_c: float
     humidity_pct: float
 
+    def measured_at_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.measured_at, tz=dt_timezone.utc)
+
+
+RecordSink = Callable[[HistoryRecord], None]
+
+_END_OF_RECORDS = object()
+
 
 class Command(BaseCommand):
     help = "Read historical H5075 records from device storage and save deduplicated measurements."
@@ -32,6 +49,9 @@ class Command(BaseCommand):
     SEND_RECORDS_TX_REQUEST = bytearray([0x33, 0x01])
     RECORDS_TX_COMPLETED = bytearray([0xEE, 0x01])
 
+    MAX_RETRY_BACKOFF_SECONDS = 8.0
+    FLUSH_INTERVAL_SECONDS = 2.0
+
     def add_arguments(self, parser) -> None:
         parser.add_argument("--mac", type=str, default="", help="Target H5075 MAC address (optional).")
         parser.add_argument(
@@ -40,6 +60,18 @@ class Command(BaseCommand):
             default="H5075",
             help="Filter by device name substring when --mac is not provided.",
         )
+        parser.add_argument(
+            "--known",
+            action="store_true",
+            help="Connect directly to devices listed in the device alias table instead of scanning first; "
+            "a scan only runs when a known device cannot be reached.",
+        )
+        parser.add_argument(
+            "--seen-within-days",
+            type=int,
+            default=0,
+            help="With --known, only use devices that reported data within this many days (0 = all).",
+        )
         parser.add_argument(
             "--start",
             type=str,
@@ -59,6 +91,35 @@ class Command(BaseCommand):
             default=2,
             help="Connection retries per device when history read fails.",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Maximum number of devices read at the same time.",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=0.5,
+            help="Initial delay in seconds before a device retry; doubles on every further attempt.",
+        )
+        parser.add_argument(
+            "--overlap",
+            type=int,
+            default=10,
+            help="Minutes re-read before each device's newest stored record in incremental mode.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore stored records and request the whole --start/--end window from every device.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records written per database transaction while the transfer is running.",
+        )
         parser.add_argument("--json", action="store_true", help="Output JSON.")
 
     def handle(self, *args, **options) -> None:
@@ -78,136 +139,366 @@ class Command(BaseCommand):
 
         timeout = float(options["timeout"])
         retries = max(0, int(options["retries"]))
+        concurrency = max(1, int(options["concurrency"]))
+        backoff = max(0.0, float(options["backoff"]))
+        overlap = max(0, int(options["overlap"]))
+
+        targets = [mac] if mac else []
+        fallback_name_contains: str | None = None
+        if not mac and options["known"]:
+            targets = self._known_targets(seen_within_days=max(0, int(options["seen_within_days"])))
+            fallback_name_contains = name_contains if targets else None
 
         try:
-            points, failures = asyncio.run(
-                self._collect_history(
-                    mac=mac,
-                    name_contains=name_contains,
-                    start_minutes=start_minutes,
-                    end_minutes=end_minutes,
-                    timeout=timeout,
-                    retries=retries,
-                )
-            )
+            if not targets:
+                targets = asyncio.run(self._discover_targets(name_contains=name_contains, timeout=timeout))
         except RuntimeError as exc:
             raise CommandError(f"Bluetooth history read failed: {exc}") from exc
 
-        if not points:
-            if failures:
-                raise CommandError(f"No historical records returned by device(s). Errors: {'; '.join(failures)}")
-            raise CommandError("No historical records returned by device(s).")
+        if options["full"]:
+            windows: dict[str, int | None] = {address: None for address in targets}
+        else:
+            windows = self._incremental_windows(targets, start_minutes, end_minutes, overlap)
+            up_to_date = [address for address in targets if address not in windows]
+            if up_to_date:
+                self.stderr.write(f"Skipped {len(up_to_date)} up-to-date device(s): {', '.join(up_to_date)}")
+            if targets and not windows:
+                self.stderr.write("All device(s) already up to date")
+                return
+
+        # Known devices left out on purpose (not seen within --seen-within-days, or already up to date) are
+        # not read just because the fallback scan finds them. Every other device it finds has no alias
+        # row, and therefore no stored history, so it is read over the whole --start window.
+        fallback_skip = self._known_addresses() - set(windows) if fallback_name_contains is not None else set()
+
+        batch_size = max(1, int(options["batch_size"]))
+        records: queue.Queue[object] = queue.Queue()
+        outcome: dict[str, object] = {}
+
+        # BLE runs on its own event loop thread and only enqueues records; this thread owns the
+        # database connection and persists them in batches while the transfer is still running.
+        collector = threading.Thread(
+            target=self._run_collector,
+            kwargs={
+                "records": records,
+                "outcome": outcome,
+                "windows": windows,
+                "fallback_name_contains": fallback_name_contains,
+                "fallback_skip": fallback_skip,
+                "start_minutes": start_minutes,
+                "end_minutes": end_minutes,
+                "timeout": timeout,
+                "retries": retries,
+                "concurrency": concurrency,
+                "backoff": backoff,
+            },
+            name="h5075-history-ble",
+            daemon=True,
+        )
+        collector.start()
 
-        self._upsert_detected_names(points)
-        name_map = self._get_name_map([item.address for item in points])
+        self._json_output = bool(options["json"])
+        self._json_items_written = 0
+        received = 0
+        saved = 0
+        batch: list[HistoryRecord] = []
 
-        before_count = H5075HistoricalMeasurement.objects.count()
+        while True:
+            try:
+                item = records.get(timeout=self.FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                saved += self._persist_batch(batch)
+                batch = []
+                continue
 
-        H5075HistoricalMeasurement.objects.bulk_create(
-            [
-                H5075HistoricalMeasurement(
-                    address=item.address,
-                    name=name_map.get(item.address.lower(), item.name),
-                    measured_at=timezone.datetime.fromisoformat(item.measured_at),
-                    temperature_c=item.temperature_c,
-                    humidity_pct=item.humidity_pct,
-                )
-                for item in points
-            ],
-            ignore_conflicts=True,
-        )
+            if item is _END_OF_RECORDS:
+                break
 
-        after_count = H5075HistoricalMeasurement.objects.count()
-        saved = after_count - before_count
-        skipped = len(points) - saved
+            batch.append(item)
+            received += 1
+            if len(batch) >= batch_size:
+                saved += self._persist_batch(batch)
+                batch = []
 
-        self.stderr.write(f"Saved {saved} historical record(s), skipped {skipped} duplicate(s)")
+        saved += self._persist_batch(batch)
+        collector.join()
+
+        if self._json_items_written:
+            self.stdout.write("\n]")
+
+        error = outcome.get("error")
+        if error is not None:
+            raise CommandError(f"Bluetooth history read failed: {error}") from error
+
+        failures = [f"{address}: {exc}" for address, exc in outcome.get("failures", {}).items()]
+        if not received:
+            if failures:
+                raise CommandError(f"No historical records returned by device(s). Errors: {'; '.join(failures)}")
+            raise CommandError("No historical records returned by device(s).")
+
+        self.stderr.write(f"Saved {saved} historical record(s), skipped {received - saved} duplicate(s)")
         if failures:
             self.stderr.write(f"Skipped {len(failures)} device(s) due to errors: {'; '.join(failures)}")
 
-        if options["json"]:
-            payload = []
-            for item in points:
+    def _run_collector(self, records: queue.Queue[object], outcome: dict[str, object], **kwargs) -> None:
+        try:
+            outcome["failures"] = asyncio.run(self._collect_with_fallback(sink=records.put, **kwargs))
+        except Exception as exc:
+            outcome["error"] = exc
+        finally:
+            records.put(_END_OF_RECORDS)
+
+    def _persist_batch(self, batch: list[HistoryRecord]) -> int:
+        if not batch:
+            return 0
+
+        upsert_detected_names(batch)
+        name_map = get_name_map([item.address for item in batch])
+
+        with transaction.atomic():
+            inserted = self._insert_new_records(batch, name_map)
+            rollup_history(inserted)
+            if inserted:
+                invalidate_history_cache(row.address for row in inserted)
+                notify_stored()
+
+        for item in batch:
+            name = name_map.get(item.address.lower(), item.name)
+            measured_at = item.measured_at_datetime().isoformat()
+            if self._json_output:
                 row = asdict(item)
-                row["name"] = name_map.get(item.address.lower(), item.name)
-                payload.append(row)
-            self.stdout.write(json.dumps(payload, indent=2))
-            return
+                row["name"] = name
+                row["measured_at"] = measured_at
+                prefix = ",\n" if self._json_items_written else "[\n"
+                self.stdout.write(prefix + json.dumps(row), ending="")
+                self._json_items_written += 1
+                continue
 
-        for item in points:
-            name = name_map.get(item.address.lower(), item.name)
             self.stdout.write(
-                f"{item.measured_at} {name} [{item.address}] "
+                f"{measured_at} {name} [{item.address}] "
                 f"temp={item.temperature_c:.1f}°C humidity={item.humidity_pct:.1f}%"
             )
 
+        return len(inserted)
+
+    @staticmethod
+    def _insert_new_records(records: list[HistoryRecord], name_map: dict[str, str]) -> list[H5075HistoricalMeasurement]:
+        candidates: dict[tuple[str, datetime], H5075HistoricalMeasurement] = {}
+        for item in records:
+            row = H5075HistoricalMeasurement(
+                address=item.address.lower(),
+                name=name_map.get(item.address.lower(), item.name),
+                measured_at=item.measured_at_datetime(),
+                temperature_c=item.temperature_c,
+                humidity_pct=item.humidity_pct,
+            )
+            candidates.setdefault((row.address, row.measured_at), row)
+
+        if not candidates:
+            return []
+
+        times = [measured_at for _, measured_at in candidates]
+        existing = set(
+            H5075HistoricalMeasurement.objects.filter(
+                address__in={address for address, _ in candidates},
+                measured_at__gte=min(times),
+                measured_at__lte=max(times),
+            ).values_list("address", "measured_at")
+        )
+        new_rows = [row for key, row in candidates.items() if key not in existing]
+        H5075HistoricalMeasurement.objects.bulk_create(new_rows, batch_size=500, ignore_conflicts=True)
+        return new_rows
+
     @staticmethod
     def _configure_ble_logging() -> None:
         logging.getLogger("bleak.backends.bluezdbus.version").setLevel(logging.ERROR)
 
     @staticmethod
-    def _get_name_map(addresses: list[str]) -> dict[str, str]:
-        normalized = sorted({(address or "").strip().lower() for address in addresses if address})
-        if not normalized:
-            return {}
-
-        aliases = H5075DeviceAlias.objects.filter(address__in=normalized)
-        return {item.address.lower(): (item.alias or item.detected_name or item.address) for item in aliases}
+    def _known_addresses() -> set[str]:
+        return {address.lower() for address in H5075DeviceAlias.objects.values_list("address", flat=True) if address}
+
+    @classmethod
+    def _known_targets(cls, seen_within_days: int) -> list[str]:
+        addresses = cls._known_addresses()
+        if not seen_within_days or not addresses:
+            return sorted(addresses)
+
+        cutoff = timezone.now() - timedelta(days=seen_within_days)
+        seen = set(
+            H5075HistoricalMeasurement.objects.filter(measured_at__gte=cutoff)
+            .values_list("address", flat=True)
+            .distinct()
+        )
+        seen.update(
+            H5075Measurement.objects.filter(created_at__gte=cutoff)
+            .values_list("address", flat=True)
+            .distinct()
+        )
+        return sorted(addresses & seen)
 
     @staticmethod
-    def _upsert_detected_names(points: list[HistoryPoint]) -> None:
-        for item in points:
-            address = (item.address or "").strip().lower()
-            if not address:
-                continue
+    def _incremental_windows(
+        targets: list[str], start_minutes: int, end_minutes: int, overlap: int
+    ) -> dict[str, int | None]:
+        """Per-device oldest record to read (epoch seconds), ``overlap`` minutes before the newest stored one.
+
+        Devices without stored records map to ``None`` (the whole ``--start`` window); devices whose missing
+        minutes all lie after ``end_minutes`` are left out. The epoch is absolute, so a device read later in
+        the run still reaches back to it.
+        """
+        now = timezone.now()
+        windows: dict[str, int | None] = {}
 
-            detected_name = (item.name or "").strip()
-            alias, _ = H5075DeviceAlias.objects.get_or_create(
-                address=address,
-                defaults={"detected_name": detected_name},
+        for address in targets:
+            # One LIMIT 1 seek on the (address, measured_at) unique index per device; a grouped MAX over
+            # all targets would read every stored row.
+            latest = (
+                H5075HistoricalMeasurement.objects.filter(address=address.lower())
+                .order_by("-measured_at")
+                .values_list("measured_at", flat=True)
+                .first()
             )
-            if alias.detected_name != detected_name:
-                alias.detected_name = detected_name
-                alias.save(update_fields=["detected_name", "updated_at"])
+            if latest is None:
+                windows[address] = None
+                continue
+
+            missing_minutes = math.ceil(max(0.0, (now - latest).total_seconds()) / 60) + overlap
+            if min(start_minutes, missing_minutes) > end_minutes:
+                windows[address] = int(latest.timestamp()) - overlap * 60
+
+        return windows
+
+    async def _collect_with_fallback(
+        self,
+        windows: dict[str, int | None],
+        fallback_name_contains: str | None,
+        fallback_skip: set[str] = frozenset(),
+        **kwargs,
+    ) -> dict[str, Exception]:
+        failures = await self._collect_history(windows=windows, **kwargs)
+        if fallback_name_contains is None or not failures:
+            return failures
+
+        # Known devices that could not be reached may have a new address or be out of range: scan once,
+        # then retry the failed ones that showed up and read any device that is not known yet.
+        discovered = await self._discover_targets(name_contains=fallback_name_contains, timeout=kwargs["timeout"])
+        retry_windows = {address: windows[address] for address in failures if address in discovered}
+        retry_windows.update(
+            {address: None for address in discovered if address not in windows and address not in fallback_skip}
+        )
+        if not retry_windows:
+            return failures
+
+        retried = await self._collect_history(windows=retry_windows, **kwargs)
+        return {address: exc for address, exc in failures.items() if address not in retry_windows} | retried
 
     async def _collect_history(
         self,
-        mac: str,
-        name_contains: str,
+        windows: dict[str, int | None],
         start_minutes: int,
         end_minutes: int,
         timeout: float,
         retries: int,
-    ) -> tuple[list[HistoryPoint], list[str]]:
-        targets = [mac] if mac else await self._discover_targets(name_contains=name_contains, timeout=timeout)
-        if not targets:
-            return [], []
+        sink: RecordSink,
+        concurrency: int = 1,
+        backoff: float = 0.5,
+    ) -> dict[str, Exception]:
+        if not windows:
+            return {}
 
-        points: list[HistoryPoint] = []
-        failures: list[str] = []
+        semaphore = asyncio.Semaphore(concurrency)
+        errors = await asyncio.gather(
+            *(
+                self._read_device_history(
+                    semaphore=semaphore,
+                    mac=address,
+                    since=since,
+                    start_minutes=start_minutes,
+                    end_minutes=end_minutes,
+                    timeout=timeout,
+                    retries=retries,
+                    backoff=backoff,
+                    sink=sink,
+                )
+                for address, since in windows.items()
+            )
+        )
 
-        for address in targets:
-            last_error: Exception | None = None
-            for _ in range(retries + 1):
+        return {address: error for address, error in zip(windows, errors) if error is not None}
+
+    async def _read_device_history(
+        self,
+        semaphore: asyncio.Semaphore,
+        mac: str,
+        since: int | None,
+        start_minutes: int,
+        end_minutes: int,
+        timeout: float,
+        retries: int,
+        backoff: float,
+        sink: RecordSink,
+    ) -> Exception | None:
+        newest_received: int | None = None
+
+        def track(record: HistoryRecord) -> None:
+            nonlocal newest_received
+            if newest_received is None or record.measured_at > newest_received:
+                newest_received = record.measured_at
+            sink(record)
+
+        last_error: Exception | None = None
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(min(backoff * 2 ** (attempt - 1), self.MAX_RETRY_BACKOFF_SECONDS))
+
+            # The slot is released while backing off so other devices can use the adapter.
+            async with semaphore:
+                # Records stream oldest to newest, so resume at the newest one already received (one minute
+                # of overlap) instead of downloading the same first chunks again. Decided only once the slot
+                # is held, and as an epoch that _read_history converts against its own reference, so time
+                # spent waiting or backing off does not move the window.
+                if newest_received is not None:
+                    if self._window_start(start_minutes, newest_received + 60, self._minute_reference()) < end_minutes:
+                        return None
+                    since = newest_received
                 try:
-                    device_points = await self._read_history(
-                        mac=address,
+                    await self._read_history(
+                        mac=mac,
                         start_minutes=start_minutes,
                         end_minutes=end_minutes,
                         timeout=timeout,
+                        sink=track,
+                        since=since,
                     )
-                    points.extend(device_points)
-                    last_error = None
-                    break
+                    return None
                 except Exception as exc:
                     last_error = exc
-                    await asyncio.sleep(0.4)
 
-            if last_error is not None:
-                failures.append(f"{address}: {last_error}")
+        return last_error
+
+    @staticmethod
+    def _minute_reference() -> int:
+        """The server's current minute (epoch seconds), which ``minutes_back`` of a read is counted from.
+
+        Records are one minute apart, so snapping to the minute grid makes repeated syncs produce identical
+        timestamps for the same record and hit uniq_h5075_history_address_timestamp. The device does not
+        report its own minute boundary, though: when it is out of phase with the server's, a read taken
+        between the two boundaries stamps every record one minute later than a read taken outside them.
+        Overlapping reads can then store one record twice a minute apart, or drop the one whose shifted
+        timestamp collides with a stored row. Taking the reference right before the read command is sent
+        keeps connect time out of it, but cannot remove the phase difference itself.
+        """
+        return int(timezone.now().replace(second=0, microsecond=0).timestamp())
+
+    @staticmethod
+    def _window_start(start_minutes: int, since: int | None, reference: int) -> int:
+        """``minutes_back`` to request so the read reaches ``since`` (epoch seconds), capped at ``start_minutes``.
 
-        points.sort(key=lambda item: (item.measured_at, item.address))
-        return points, failures
+        Negative when ``since`` lies after ``reference``, i.e. nothing that new can be stored on the device yet.
+        """
+        if since is None:
+            return start_minutes
+        return min(start_minutes, math.ceil((reference - since) / 60))
 
     async def _discover_targets(self, name_contains: str, timeout: float) -> list[str]:
         from bleak import BleakScanner
@@ -224,14 +515,28 @@ class Command(BaseCommand):
 
         return sorted(set(targets))
 
-    async def _read_history(self, mac: str, start_minutes: int, end_minutes: int, timeout: float) -> list[HistoryPoint]:
-        from bleak import BleakClient
+    async def _read_history(
+        self,
+        mac: str,
+        start_minutes: int,
+        end_minutes: int,
+        timeout: float,
+        sink: RecordSink,
+        since: int | None = None,
+    ) -> int:
+        """Stream the device's records from ``since`` (epoch seconds, else ``start_minutes`` back) to ``end_minutes``.
+
+        ``since`` becomes ``minutes_back`` against the same reference that stamps ``measured_at``, taken
+        once connected, so time spent waiting for this read does not shift its window.
+        """
+        if self._window_start(start_minutes, since, self._minute_reference()) < end_minutes:
+            return 0
 
         completion = asyncio.Event()
-        start_reference = timezone.now()
-        records: list[HistoryPoint] = []
+        start_reference = 0
+        received = 0
 
-        async with BleakClient(mac, timeout=timeout) as client:
+        async with self._create_client(mac, timeout=timeout) as client:
             if not client.is_connected:
                 raise RuntimeError("Unable to connect")
 
@@ -244,6 +549,7 @@ class Command(BaseCommand):
                     completion.set()
 
             def on_data(_: object, data: bytearray) -> None:
+                nonlocal received
                 if len(data) < 20:
                     return
 
@@ -254,25 +560,27 @@ class Command(BaseCommand):
                         continue
 
                     temperature_c, humidity_pct = decode_temp_humid(chunk)
-                    measured_at = start_reference - timedelta(minutes=(minutes_back - i))
-                    records.append(
-                        HistoryPoint(
+                    sink(
+                        HistoryRecord(
                             address=mac,
                             name=device_name,
-                            measured_at=measured_at.isoformat(),
+                            measured_at=start_reference - (minutes_back - i) * 60,
                             temperature_c=temperature_c,
                             humidity_pct=humidity_pct,
                         )
                     )
+                    received += 1
 
             try:
                 await client.start_notify(self.UUID_COMMAND, on_command)
                 command_notify_started = True
                 await client.start_notify(self.UUID_DATA, on_data)
                 data_notify_started = True
+                start_reference = self._minute_reference()
+                window_start = max(self._window_start(start_minutes, since, start_reference), end_minutes)
                 await client.write_gatt_char(
                     self.UUID_COMMAND,
-                    self._build_history_command(start_minutes=start_minutes, end_minutes=end_minutes),
+                    self._build_history_command(start_minutes=window_start, end_minutes=end_minutes),
                     response=True,
                 )
             except Exception as exc:
@@ -280,8 +588,8 @@ class Command(BaseCommand):
 
             try:
                 await asyncio.wait_for(completion.wait(), timeout=timeout)
-            except TimeoutError:
-                pass
+            except TimeoutError as exc:
+                raise RuntimeError(f"History transfer timed out after {received} record(s)") from exc
             finally:
                 if client.is_connected and data_notify_started:
                     try:
@@ -294,8 +602,13 @@ class Command(BaseCommand):
                     except Exception:
                         pass
 
-        records.sort(key=lambda item: item.measured_at)
-        return records
+        return received
+
+    @staticmethod
+    def _create_client(mac: str, timeout: float) -> object:
+        from bleak import BleakClient
+
+        return BleakClient(mac, timeout=timeout)
 
     async def _safe_read_name(self, client: object) -> str:
         try:
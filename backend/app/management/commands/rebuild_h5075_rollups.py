@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from app.models import H5075MeasurementRollup
+from app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute H5075 rollup buckets (1m/15m/1h/1d) from the raw measurement tables."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--source",
+            choices=[H5075MeasurementRollup.SOURCE_HISTORY, H5075MeasurementRollup.SOURCE_LIVE, "all"],
+            default="all",
+            help="Which raw table to rebuild rollups from.",
+        )
+        parser.add_argument("--mac", type=str, default="", help="Only rebuild rollups for this MAC address.")
+
+    def handle(self, *args, **options) -> None:
+        mac = (options["mac"] or "").strip().lower()
+        addresses = [mac] if mac else None
+
+        sources = (
+            [H5075MeasurementRollup.SOURCE_HISTORY, H5075MeasurementRollup.SOURCE_LIVE]
+            if options["source"] == "all"
+            else [options["source"]]
+        )
+
+        for source in sources:
+            written = rebuild_rollups(source, addresses=addresses)
+            self.stdout.write(f"Rebuilt {written} {source} rollup bucket(s)")
@@ -21,6 +21,16 @@ class Command(BaseCommand):
         parser.add_argument("--end", type=str, default="0:00", help="Newest point in the past as hhh:mm.")
         parser.add_argument("--timeout", type=float, default=25.0, help="BLE command timeout in seconds.")
         parser.add_argument("--retries", type=int, default=3, help="Connection retries per device.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Maximum number of devices read at once.")
+        parser.add_argument("--overlap", type=int, default=10, help="Minutes re-read before each device's newest record.")
+        parser.add_argument("--known", action="store_true", help="Connect to known devices without scanning first.")
+        parser.add_argument(
+            "--seen-within-days",
+            type=int,
+            default=0,
+            help="With --known, only use devices seen within this many days (0 = all).",
+        )
+        parser.add_argument("--full", action="store_true", help="Re-read the whole window instead of only missing records.")
         parser.add_argument("--mac", type=str, default="", help="Optional MAC filter.")
         parser.add_argument(
             "--name-contains",
@@ -60,8 +70,18 @@ class Command(BaseCommand):
             str(options["timeout"]),
             "--retries",
             str(options["retries"]),
+            "--concurrency",
+            str(options["concurrency"]),
+            "--overlap",
+            str(options["overlap"]),
         ]
 
+        if options["full"]:
+            command_args.append("--full")
+
+        if options["known"]:
+            command_args.extend(["--known", "--seen-within-days", str(options["seen_within_days"])])
+
         mac = (options["mac"] or "").strip()
         if mac:
             command_args.extend(["--mac", mac])
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, Max, Min, Sum
+from django.db.models.functions import Lower
+
+from app.db_functions import BucketEpoch
+
+
+ROLLUP_BUCKET_MINUTES = (1, 15, 60, 1440)
+
+
+def backfill_rollups(apps, schema_editor):
+    rollup_model = apps.get_model("app", "H5075MeasurementRollup")
+    sources = (
+        ("history", apps.get_model("app", "H5075HistoricalMeasurement"), "measured_at"),
+        ("live", apps.get_model("app", "H5075Measurement"), "created_at"),
+    )
+
+    for source, raw_model, time_field in sources:
+        for granularity in ROLLUP_BUCKET_MINUTES:
+            buckets = (
+                raw_model.objects.order_by()
+                .values(
+                    address_key=Lower("address"),
+                    bucket_epoch=BucketEpoch(time_field, bucket_seconds=granularity * 60),
+                )
+                .annotate(
+                    samples=Count("id"),
+                    temperature_sum=Sum("temperature_c", output_field=FloatField()),
+                    temperature_min=Min("temperature_c", output_field=FloatField()),
+                    temperature_max=Max("temperature_c", output_field=FloatField()),
+                    humidity_sum=Sum("humidity_pct", output_field=FloatField()),
+                    humidity_min=Min("humidity_pct", output_field=FloatField()),
+                    humidity_max=Max("humidity_pct", output_field=FloatField()),
+                )
+            )
+            rollup_model.objects.bulk_create(
+                (
+                    rollup_model(
+                        source=source,
+                        address=item["address_key"],
+                        bucket_minutes=granularity,
+                        bucket_start=datetime.fromtimestamp(int(item["bucket_epoch"]), tz=dt_timezone.utc),
+                        samples=item["samples"],
+                        temperature_sum=item["temperature_sum"],
+                        temperature_min=item["temperature_min"],
+                        temperature_max=item["temperature_max"],
+                        humidity_sum=item["humidity_sum"],
+                        humidity_min=item["humidity_min"],
+                        humidity_max=item["humidity_max"],
+                    )
+                    for item in buckets.iterator(chunk_size=2000)
+                ),
+                batch_size=500,
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0006_h5075devicealias_detected_name_and_alias_blank"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="H5075MeasurementRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source", models.CharField(choices=[("history", "History"), ("live", "Live")], max_length=8)),
+                ("address", models.CharField(max_length=17)),
+                ("bucket_minutes", models.PositiveSmallIntegerField()),
+                ("bucket_start", models.DateTimeField()),
+                ("samples", models.PositiveIntegerField(default=0)),
+                ("temperature_sum", models.FloatField(default=0.0)),
+                ("temperature_min", models.FloatField()),
+                ("temperature_max", models.FloatField()),
+                ("humidity_sum", models.FloatField(default=0.0)),
+                ("humidity_min", models.FloatField()),
+                ("humidity_max", models.FloatField()),
+            ],
+            options={
+                "ordering": ["-bucket_start"],
+                "indexes": [
+                    models.Index(fields=["source", "bucket_minutes", "bucket_start"], name="h5075_rollup_time_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("source", "bucket_minutes", "address", "bucket_start"),
+                        name="uniq_h5075_rollup_bucket",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
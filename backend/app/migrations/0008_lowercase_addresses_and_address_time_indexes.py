@@ -0,0 +1,109 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Max, Min, Q, Subquery, Sum
+from django.db.models.functions import Lower
+
+from app.db_functions import BucketEpoch
+
+
+ROLLUP_BUCKET_MINUTES = (1, 15, 60, 1440)
+
+
+def _mixed_case_addresses(model):
+    return sorted(set(model.objects.filter(~Q(address=Lower("address"))).values_list("address", flat=True)))
+
+
+def _rebuild_history_rollups(apps, addresses):
+    rollup_model = apps.get_model("app", "H5075MeasurementRollup")
+    history_model = apps.get_model("app", "H5075HistoricalMeasurement")
+    rollup_model.objects.filter(source="history", address__in=addresses).delete()
+
+    for granularity in ROLLUP_BUCKET_MINUTES:
+        buckets = (
+            history_model.objects.filter(address__in=addresses)
+            .order_by()
+            .values(address_key=F("address"), bucket_epoch=BucketEpoch("measured_at", bucket_seconds=granularity * 60))
+            .annotate(
+                samples=Count("id"),
+                temperature_sum=Sum("temperature_c", output_field=FloatField()),
+                temperature_min=Min("temperature_c", output_field=FloatField()),
+                temperature_max=Max("temperature_c", output_field=FloatField()),
+                humidity_sum=Sum("humidity_pct", output_field=FloatField()),
+                humidity_min=Min("humidity_pct", output_field=FloatField()),
+                humidity_max=Max("humidity_pct", output_field=FloatField()),
+            )
+        )
+        rollup_model.objects.bulk_create(
+            (
+                rollup_model(
+                    source="history",
+                    address=item["address_key"],
+                    bucket_minutes=granularity,
+                    bucket_start=datetime.fromtimestamp(int(item["bucket_epoch"]), tz=dt_timezone.utc),
+                    samples=item["samples"],
+                    temperature_sum=item["temperature_sum"],
+                    temperature_min=item["temperature_min"],
+                    temperature_max=item["temperature_max"],
+                    humidity_sum=item["humidity_sum"],
+                    humidity_min=item["humidity_min"],
+                    humidity_max=item["humidity_max"],
+                )
+                for item in buckets.iterator(chunk_size=2000)
+            ),
+            batch_size=500,
+        )
+
+
+def lowercase_addresses(apps, schema_editor):
+    measurement_model = apps.get_model("app", "H5075Measurement")
+    measurement_model.objects.filter(~Q(address=Lower("address"))).update(address=Lower("address"))
+
+    # Snapshots and history rows are unique per address; a row whose lower-cased twin already exists
+    # is a duplicate of it and is dropped instead of renamed.
+    snapshot_model = apps.get_model("app", "H5075AdvertisementSnapshot")
+    for address in _mixed_case_addresses(snapshot_model):
+        lowered = snapshot_model.objects.filter(address=address.lower())
+        for row in snapshot_model.objects.filter(address=address):
+            if lowered.filter(manufacturer_id=row.manufacturer_id, payload_hex=row.payload_hex).exists():
+                row.delete()
+            else:
+                row.address = address.lower()
+                row.save(update_fields=["address"])
+
+    history_model = apps.get_model("app", "H5075HistoricalMeasurement")
+    merged = set()
+    for address in _mixed_case_addresses(history_model):
+        existing = history_model.objects.filter(address=address.lower()).values("measured_at")
+        deleted, _ = history_model.objects.filter(address=address, measured_at__in=Subquery(existing)).delete()
+        history_model.objects.filter(address=address).update(address=address.lower())
+        if deleted:
+            merged.add(address.lower())
+
+    # Rollups were already keyed by lower-cased address, so only devices that lost duplicates need rebuilding.
+    if merged:
+        _rebuild_history_rollups(apps, sorted(merged))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0007_h5075measurementrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_addresses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="h5075historicalmeasurement",
+            name="address",
+            field=models.CharField(max_length=17),
+        ),
+        migrations.AlterField(
+            model_name="h5075measurement",
+            name="address",
+            field=models.CharField(max_length=17),
+        ),
+        migrations.AddIndex(
+            model_name="h5075measurement",
+            index=models.Index(fields=["address", "created_at"], name="h5075_meas_address_time_idx"),
+        ),
+    ]
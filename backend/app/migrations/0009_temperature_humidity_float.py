@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+# Rebuilding the columns as REAL converts the stored values; the sensors report 0.1 resolution,
+# so no precision is lost.
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0008_lowercase_addresses_and_address_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="h5075advertisementsnapshot",
+            name="humidity_pct",
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name="h5075advertisementsnapshot",
+            name="temperature_c",
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name="h5075historicalmeasurement",
+            name="humidity_pct",
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name="h5075historicalmeasurement",
+            name="temperature_c",
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name="h5075measurement",
+            name="humidity_pct",
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name="h5075measurement",
+            name="temperature_c",
+            field=models.FloatField(),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_temperature_humidity_float"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="h5075devicealias",
+            name="temperature_deadband",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="h5075devicealias",
+            name="humidity_deadband",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="h5075devicealias",
+            name="battery_deadband",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="h5075devicealias",
+            name="heartbeat_seconds",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_h5075devicealias_change_policy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="h5075historicalmeasurement",
+            index=models.Index(fields=["address", "created_at"], name="h5075_hist_address_created_idx"),
+        ),
+    ]
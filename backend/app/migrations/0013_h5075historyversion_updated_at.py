@@ -0,0 +1,18 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_h5075historyversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="h5075historyversion",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -2,10 +2,10 @@ from django.db import models
 
 
 class H5075Measurement(models.Model):
-    address = models.CharField(max_length=17, db_index=True)
+    address = models.CharField(max_length=17)
     name = models.CharField(max_length=128, blank=True)
-    temperature_c = models.DecimalField(max_digits=5, decimal_places=2)
-    humidity_pct = models.DecimalField(max_digits=5, decimal_places=2)
+    temperature_c = models.FloatField()
+    humidity_pct = models.FloatField()
     battery_pct = models.PositiveSmallIntegerField()
     error = models.BooleanField(default=False)
     # RSSI (Received Signal Strength Indicator): Bluetooth signal strength in dBm; higher (less negative) is stronger.
@@ -14,6 +14,13 @@ class H5075Measurement(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["address", "created_at"], name="h5075_meas_address_time_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.address = (self.address or "").strip().lower()
+        return super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.name or 'H5075'} {self.address} @ {self.created_at.isoformat()}"
@@ -25,8 +32,8 @@ class H5075AdvertisementSnapshot(models.Model):
     manufacturer_id = models.PositiveIntegerField()
     payload_hex = models.CharField(max_length=64)
     service_uuids = models.JSONField(default=list, blank=True)
-    temperature_c = models.DecimalField(max_digits=5, decimal_places=2)
-    humidity_pct = models.DecimalField(max_digits=5, decimal_places=2)
+    temperature_c = models.FloatField()
+    humidity_pct = models.FloatField()
     battery_pct = models.PositiveSmallIntegerField()
     error = models.BooleanField(default=False)
     rssi = models.SmallIntegerField(null=True, blank=True)
@@ -41,16 +48,21 @@ class H5075AdvertisementSnapshot(models.Model):
             )
         ]
 
+    def save(self, *args, **kwargs):
+        self.address = (self.address or "").strip().lower()
+        return super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"{self.name or 'H5075'} {self.address} payload={self.payload_hex}"
 
 
 class H5075HistoricalMeasurement(models.Model):
-    address = models.CharField(max_length=17, db_index=True)
+    # Lookups by address use the (address, measured_at) unique index.
+    address = models.CharField(max_length=17)
     name = models.CharField(max_length=128, blank=True)
     measured_at = models.DateTimeField(db_index=True)
-    temperature_c = models.DecimalField(max_digits=5, decimal_places=2)
-    humidity_pct = models.DecimalField(max_digits=5, decimal_places=2)
+    temperature_c = models.FloatField()
+    humidity_pct = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
@@ -61,15 +73,45 @@ class H5075HistoricalMeasurement(models.Model):
                 name="uniq_h5075_history_address_timestamp",
             )
         ]
+        indexes = [
+            # Per-device "stored since" lookups (the ``since`` filter and the cache watermark).
+            models.Index(fields=["address", "created_at"], name="h5075_hist_address_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.address = (self.address or "").strip().lower()
+        return super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.name or 'H5075'} {self.address} @ {self.measured_at.isoformat()}"
 
 
+class H5075HistoryVersion(models.Model):
+    """Per-device counter bumped when stored history rows are deleted or rewritten.
+
+    Newly inserted rows already move ``MAX(created_at)``; deletes and in-place edits only show up here.
+    """
+
+    address = models.CharField(max_length=17, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["address"]
+
+    def __str__(self) -> str:
+        return f"{self.address} v{self.version}"
+
+
 class H5075DeviceAlias(models.Model):
     address = models.CharField(max_length=17, unique=True)
     alias = models.CharField(max_length=128, blank=True)
     detected_name = models.CharField(max_length=128, blank=True)
+    # Per-device change policy for live readings; empty fields fall back to the collector's flags.
+    temperature_deadband = models.FloatField(null=True, blank=True)
+    humidity_deadband = models.FloatField(null=True, blank=True)
+    battery_deadband = models.PositiveSmallIntegerField(null=True, blank=True)
+    heartbeat_seconds = models.FloatField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -102,3 +144,36 @@ class H5075HistorySyncState(models.Model):
 
     def __str__(self) -> str:
         return f"{self.job_name} ({self.last_status})"
+
+
+class H5075MeasurementRollup(models.Model):
+    SOURCE_HISTORY = "history"
+    SOURCE_LIVE = "live"
+    SOURCE_CHOICES = [(SOURCE_HISTORY, "History"), (SOURCE_LIVE, "Live")]
+
+    source = models.CharField(max_length=8, choices=SOURCE_CHOICES)
+    address = models.CharField(max_length=17)
+    bucket_minutes = models.PositiveSmallIntegerField()
+    bucket_start = models.DateTimeField()
+    samples = models.PositiveIntegerField(default=0)
+    temperature_sum = models.FloatField(default=0.0)
+    temperature_min = models.FloatField()
+    temperature_max = models.FloatField()
+    humidity_sum = models.FloatField(default=0.0)
+    humidity_min = models.FloatField()
+    humidity_max = models.FloatField()
+
+    class Meta:
+        ordering = ["-bucket_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "bucket_minutes", "address", "bucket_start"],
+                name="uniq_h5075_rollup_bucket",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["source", "bucket_minutes", "bucket_start"], name="h5075_rollup_time_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source} {self.address} {self.bucket_minutes}m @ {self.bucket_start.isoformat()}"
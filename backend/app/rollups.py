@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Max, Min, Sum
+
+from app.db_functions import BucketEpoch
+from app.history_cache import bump_history_versions, invalidate_history_cache
+from app.models import H5075HistoricalMeasurement, H5075Measurement, H5075MeasurementRollup
+
+
+ROLLUP_BUCKET_MINUTES = (1, 15, 60, 1440)
+
+ROLLUP_UPDATE_FIELDS = [
+    "samples",
+    "temperature_sum",
+    "temperature_min",
+    "temperature_max",
+    "humidity_sum",
+    "humidity_min",
+    "humidity_max",
+]
+
+Sample = tuple[str, datetime, float, float]
+
+
+def rollup_bucket_minutes_for(bucket_minutes: int) -> int:
+    """Coarsest rollup granularity whose buckets tile ``bucket_minutes`` exactly."""
+    for granularity in sorted(ROLLUP_BUCKET_MINUTES, reverse=True):
+        if bucket_minutes % granularity == 0:
+            return granularity
+    return ROLLUP_BUCKET_MINUTES[0]
+
+
+def rollup_history(rows: Iterable[H5075HistoricalMeasurement]) -> None:
+    apply_rollups(
+        H5075MeasurementRollup.SOURCE_HISTORY,
+        ((row.address, row.measured_at, float(row.temperature_c), float(row.humidity_pct)) for row in rows),
+    )
+
+
+def rollup_live(rows: Iterable[H5075Measurement]) -> None:
+    apply_rollups(
+        H5075MeasurementRollup.SOURCE_LIVE,
+        ((row.address, row.created_at, float(row.temperature_c), float(row.humidity_pct)) for row in rows),
+    )
+
+
+def apply_rollups(source: str, samples: Iterable[Sample]) -> None:
+    """Fold newly inserted samples into every rollup granularity.
+
+    Callers pass only rows that were actually inserted, inside the same transaction as the insert,
+    so the counters never drift from the raw tables.
+    """
+    deltas: dict[tuple[int, str, int], list[float]] = {}
+    for address, measured_at, temperature_c, humidity_pct in samples:
+        address_key = (address or "").strip().lower()
+        if not address_key:
+            continue
+
+        epoch = int(measured_at.timestamp())
+        for granularity in ROLLUP_BUCKET_MINUTES:
+            bucket_seconds = granularity * 60
+            key = (granularity, address_key, epoch - (epoch % bucket_seconds))
+            current = deltas.get(key)
+            if current is None:
+                deltas[key] = [1, temperature_c, temperature_c, temperature_c, humidity_pct, humidity_pct, humidity_pct]
+                continue
+
+            current[0] += 1
+            current[1] += temperature_c
+            current[2] = min(current[2], temperature_c)
+            current[3] = max(current[3], temperature_c)
+            current[4] += humidity_pct
+            current[5] = min(current[5], humidity_pct)
+            current[6] = max(current[6], humidity_pct)
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        existing = _load_existing(source, deltas)
+        merged: list[H5075MeasurementRollup] = []
+        for (granularity, address_key, bucket_epoch), delta in deltas.items():
+            bucket_start = datetime.fromtimestamp(bucket_epoch, tz=dt_timezone.utc)
+            row = existing.get((granularity, address_key, bucket_epoch))
+            if row is None:
+                row = H5075MeasurementRollup(
+                    source=source,
+                    address=address_key,
+                    bucket_minutes=granularity,
+                    bucket_start=bucket_start,
+                    temperature_min=delta[2],
+                    temperature_max=delta[3],
+                    humidity_min=delta[5],
+                    humidity_max=delta[6],
+                )
+            else:
+                row.temperature_min = min(row.temperature_min, delta[2])
+                row.temperature_max = max(row.temperature_max, delta[3])
+                row.humidity_min = min(row.humidity_min, delta[5])
+                row.humidity_max = max(row.humidity_max, delta[6])
+
+            row.samples += int(delta[0])
+            row.temperature_sum += delta[1]
+            row.humidity_sum += delta[4]
+            merged.append(row)
+
+        H5075MeasurementRollup.objects.bulk_create(
+            merged,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["source", "bucket_minutes", "address", "bucket_start"],
+            update_fields=ROLLUP_UPDATE_FIELDS,
+        )
+
+
+def _load_existing(
+    source: str, deltas: dict[tuple[int, str, int], list[float]]
+) -> dict[tuple[int, str, int], H5075MeasurementRollup]:
+    ranges: dict[tuple[int, str], tuple[int, int]] = {}
+    for granularity, address_key, bucket_epoch in deltas:
+        low, high = ranges.get((granularity, address_key), (bucket_epoch, bucket_epoch))
+        ranges[(granularity, address_key)] = (min(low, bucket_epoch), max(high, bucket_epoch))
+
+    existing: dict[tuple[int, str, int], H5075MeasurementRollup] = {}
+    for (granularity, address_key), (low, high) in ranges.items():
+        rows = H5075MeasurementRollup.objects.filter(
+            source=source,
+            bucket_minutes=granularity,
+            address=address_key,
+            bucket_start__gte=datetime.fromtimestamp(low, tz=dt_timezone.utc),
+            bucket_start__lte=datetime.fromtimestamp(high, tz=dt_timezone.utc),
+        )
+        for row in rows:
+            existing[(granularity, address_key, int(row.bucket_start.timestamp()))] = row
+
+    return existing
+
+
+def rebuild_rollups(source: str, addresses: Iterable[str] | None = None) -> int:
+    """Recompute rollups for ``source`` from the raw table; returns the number of rollup rows written."""
+    if source == H5075MeasurementRollup.SOURCE_HISTORY:
+        raw = H5075HistoricalMeasurement.objects.all()
+        time_field = "measured_at"
+    else:
+        raw = H5075Measurement.objects.all()
+        time_field = "created_at"
+
+    rollups = H5075MeasurementRollup.objects.filter(source=source)
+    if addresses is not None:
+        address_keys = sorted({(address or "").strip().lower() for address in addresses if address})
+        raw = raw.filter(address__in=address_keys)
+        rollups = rollups.filter(address__in=address_keys)
+
+    written = 0
+    with transaction.atomic():
+        if source == H5075MeasurementRollup.SOURCE_HISTORY:
+            invalidate_history_cache(address_keys if addresses is not None else None)
+            bump_history_versions(address_keys if addresses is not None else None)
+        rollups.delete()
+        for granularity in ROLLUP_BUCKET_MINUTES:
+            buckets = (
+                raw.order_by()
+                .values(
+                    address_key=F("address"),
+                    bucket_epoch=BucketEpoch(time_field, bucket_seconds=granularity * 60),
+                )
+                .annotate(
+                    samples=Count("id"),
+                    temperature_sum=Sum("temperature_c", output_field=FloatField()),
+                    temperature_min=Min("temperature_c", output_field=FloatField()),
+                    temperature_max=Max("temperature_c", output_field=FloatField()),
+                    humidity_sum=Sum("humidity_pct", output_field=FloatField()),
+                    humidity_min=Min("humidity_pct", output_field=FloatField()),
+                    humidity_max=Max("humidity_pct", output_field=FloatField()),
+                )
+            )
+            batch: list[H5075MeasurementRollup] = []
+            for item in buckets.iterator(chunk_size=2000):
+                batch.append(
+                    H5075MeasurementRollup(
+                        source=source,
+                        address=item["address_key"],
+                        bucket_minutes=granularity,
+                        bucket_start=datetime.fromtimestamp(int(item["bucket_epoch"]), tz=dt_timezone.utc),
+                        samples=item["samples"],
+                        temperature_sum=item["temperature_sum"],
+                        temperature_min=item["temperature_min"],
+                        temperature_max=item["temperature_max"],
+                        humidity_sum=item["humidity_sum"],
+                        humidity_min=item["humidity_min"],
+                        humidity_max=item["humidity_max"],
+                    )
+                )
+                if len(batch) >= 2000:
+                    H5075MeasurementRollup.objects.bulk_create(batch, batch_size=500)
+                    written += len(batch)
+                    batch = []
+
+            if batch:
+                H5075MeasurementRollup.objects.bulk_create(batch, batch_size=500)
+                written += len(batch)
+
+    return written
@@ -60,13 +60,48 @@ TEMPLATES = [
 WSGI_APPLICATION = "app.wsgi.application"
 ASGI_APPLICATION = "app.asgi.application"
 
+# The collector, history sync and web workers share one SQLite file: WAL lets readers run alongside the
+# writer, IMMEDIATE transactions take the write lock up front instead of failing on upgrade, and the
+# busy timeout makes a blocked writer wait instead of raising "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-20000"),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items() if value),
+            "timeout": float(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
 
+# History responses are cached server-side and invalidated by the ingest commands (see app/history_cache.py).
+# Point DJANGO_CACHE_DIR at a directory shared by the web workers and the ingest processes so invalidation
+# reaches all of them; without it each process keeps its own local-memory cache.
+CACHE_DIR = os.getenv("DJANGO_CACHE_DIR", "")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": CACHE_DIR}
+        if CACHE_DIR
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+HISTORY_CACHE_TIMEOUT = int(os.getenv("HISTORY_CACHE_TIMEOUT", "300"))
+
+# /api/live/ streams newly stored rows. Writers rewrite LIVE_NOTIFY_PATH after each commit so the web
+# processes only query SQLite when something was stored; without it they query every LIVE_POLL_INTERVAL seconds.
+LIVE_NOTIFY_PATH = os.getenv("LIVE_NOTIFY_PATH", "")
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "1"))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
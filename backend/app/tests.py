@@ -1,13 +1,22 @@
+from base64 import urlsafe_b64encode
 import asyncio
 import json
 import os
-from datetime import timedelta
+import struct
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
 from io import StringIO
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.management import CommandError, call_command
-from django.test import Client, TestCase
+from django.db import NotSupportedError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from app.govee_ble import (
@@ -18,9 +27,41 @@ from app.govee_ble import (
     parse_h5075_advertisement_data,
     parse_h5075_manufacturer_data,
 )
-from app.management.commands.read_h5075_history import HistoryPoint
+from app.aliases import upsert_detected_names
+from app.db_functions import EpochSeconds
+from app.ingest import (
+    AttachNames,
+    ChangePolicy,
+    DropUnchanged,
+    FunctionStage,
+    IngestPipeline,
+    StoreMeasurements,
+    latest_live_rows,
+    latest_live_values,
+    reading_values,
+)
+from app.live_buffer import LatestReadingBuffer
+from app.live_events import LiveBroadcaster
+from app.management.commands.read_h5075_history import Command as ReadHistoryCommand
+from app.management.commands.read_h5075_history import HistoryRecord
 from app.models import H5075AdvertisementSnapshot, H5075DeviceAlias, H5075HistorySyncState, H5075Measurement
-from app.models import H5075HistoricalMeasurement
+from app.models import H5075HistoricalMeasurement, H5075HistoryVersion, H5075MeasurementRollup
+from app.rollups import rollup_bucket_minutes_for, rollup_history
+from app.views import _export_page
+
+
+HISTORY_EPOCH = int(datetime(2026, 2, 20, 10, 0, tzinfo=dt_timezone.utc).timestamp())
+
+
+def history_reader(records: list[HistoryRecord]) -> AsyncMock:
+    """Patch target for ReadHistoryCommand._read_history that streams ``records`` into the command's sink."""
+
+    async def read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+        for record in records:
+            sink(record)
+        return len(records)
+
+    return AsyncMock(side_effect=read_history)
 
 
 class HealthEndpointTests(TestCase):
@@ -40,6 +81,20 @@ class HealthEndpointTests(TestCase):
         self.assertEqual(response.json(), {"status": "ok"})
 
 
+class SQLiteSettingsTests(TestCase):
+    def test_connection_applies_pragmas(self) -> None:
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ("synchronous", "cache_size", "temp_store", "busy_timeout"):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+
+        self.assertEqual(pragmas["synchronous"], 1)
+        self.assertEqual(pragmas["cache_size"], -20000)
+        self.assertEqual(pragmas["temp_store"], 2)
+        self.assertEqual(pragmas["busy_timeout"], 20000)
+
+
 class AdminEndpointTests(TestCase):
     def setUp(self) -> None:
         self.client = Client()
@@ -106,6 +161,7 @@ class HistoryApiEndpointTests(TestCase):
         self.client = Client()
         self.user_model = get_user_model()
         self.user = self.user_model.objects.create_user(username="sandro", password="secret-123")
+        cache.clear()
 
     def test_history_api_returns_chart_points(self) -> None:
         H5075HistoricalMeasurement.objects.create(
@@ -154,7 +210,7 @@ class HistoryApiEndpointTests(TestCase):
         self.assertEqual(response.status_code, 200)
         payload = response.json()
         self.assertEqual(payload["count"], 1)
-        self.assertEqual(payload["points"][0]["address"], "AA:BB:CC:DD:EE:01")
+        self.assertEqual(payload["points"][0]["address"], "aa:bb:cc:dd:ee:01")
 
     def test_history_api_rejects_invalid_limit(self) -> None:
         response = self.client.get("/api/history/?limit=abc")
@@ -202,6 +258,8 @@ class HistoryApiEndpointTests(TestCase):
             humidity_pct=48.0,
         )
 
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
         response = self.client.get("/api/history/?address=AA:BB:CC:DD:EE:01&bucket_minutes=10")
 
         self.assertEqual(response.status_code, 200)
@@ -213,6 +271,289 @@ class HistoryApiEndpointTests(TestCase):
         self.assertAlmostEqual(payload["points"][1]["temperature_c"], 24.0)
         self.assertAlmostEqual(payload["points"][1]["humidity_pct"], 48.0)
 
+    def test_history_api_buckets_each_address_separately(self) -> None:
+        base = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for address, temperature_c in (("AA:BB:CC:DD:EE:01", 20.0), ("aa:bb:cc:dd:ee:01", 22.0), ("AA:BB:CC:DD:EE:02", 18.0)):
+            H5075HistoricalMeasurement.objects.create(
+                address=address,
+                name="H5075",
+                measured_at=base + timedelta(minutes=1 if address.isupper() else 2),
+                temperature_c=temperature_c,
+                humidity_pct=40.0,
+            )
+
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
+        response = self.client.get("/api/history/?bucket_minutes=10")
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["count"], 2)
+        by_address = {point["address"].lower(): point for point in payload["points"]}
+        self.assertAlmostEqual(by_address["aa:bb:cc:dd:ee:01"]["temperature_c"], 21.0)
+        self.assertEqual(by_address["aa:bb:cc:dd:ee:01"]["samples"], 2)
+        self.assertAlmostEqual(by_address["aa:bb:cc:dd:ee:02"]["temperature_c"], 18.0)
+
+    def test_history_api_bucket_limit_keeps_newest_buckets(self) -> None:
+        base = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for offset in range(3):
+            H5075HistoricalMeasurement.objects.create(
+                address="AA:BB:CC:DD:EE:01",
+                name="H5075_A",
+                measured_at=base - timedelta(hours=offset),
+                temperature_c=20.0 + offset,
+                humidity_pct=40.0,
+            )
+
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
+        response = self.client.get("/api/history/?bucket_minutes=60&limit=2")
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["count"], 2)
+        self.assertTrue(payload["truncated"])
+        self.assertAlmostEqual(payload["points"][0]["temperature_c"], 21.0)
+        self.assertAlmostEqual(payload["points"][1]["temperature_c"], 20.0)
+
+    def test_history_api_cursor_pages_through_rows_with_equal_timestamps(self) -> None:
+        base = timezone.now().replace(second=0, microsecond=0)
+        for address in ("aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02"):
+            for offset in range(3):
+                H5075HistoricalMeasurement.objects.create(
+                    address=address,
+                    name="H5075",
+                    measured_at=base - timedelta(minutes=offset),
+                    temperature_c=20.0 + offset,
+                    humidity_pct=40.0,
+                )
+
+        seen = []
+        cursor = ""
+        while True:
+            response = self.client.get(f"/api/history/?limit=4&cursor={cursor}")
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            seen = [(point["address"], point["measured_at"]) for point in payload["points"]] + seen
+            if not payload["truncated"]:
+                self.assertIsNone(payload["next_cursor"])
+                break
+            cursor = payload["next_cursor"]
+
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+        self.assertEqual([measured_at for _, measured_at in seen], sorted(measured_at for _, measured_at in seen))
+
+    def test_history_api_buckets_clip_partial_edges_to_the_requested_range(self) -> None:
+        base = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        rows = [
+            H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075_A",
+                measured_at=base + timedelta(minutes=offset),
+                temperature_c=20.0,
+                humidity_pct=40.0,
+            )
+            for offset in range(0, 180, 10)
+        ]
+        rollup_history(rows)
+
+        payload = self.client.get(
+            "/api/history/?bucket_minutes=60&from=2026-03-01T12:30:00Z&to=2026-03-01T14:30:00Z"
+        ).json()
+
+        self.assertEqual(
+            [(point["measured_at"], point["samples"]) for point in payload["points"]],
+            [
+                ("2026-03-01T12:00:00+00:00", 3),
+                ("2026-03-01T13:00:00+00:00", 6),
+                ("2026-03-01T14:00:00+00:00", 3),
+            ],
+        )
+        self.assertEqual(payload["points"][0]["name"], "H5075_A")
+
+    def test_history_api_cursor_pages_through_buckets(self) -> None:
+        base = timezone.now().replace(minute=0, second=0, microsecond=0)
+        for offset in range(3):
+            H5075HistoricalMeasurement.objects.create(
+                address="AA:BB:CC:DD:EE:01",
+                name="H5075_A",
+                measured_at=base - timedelta(hours=offset),
+                temperature_c=20.0 + offset,
+                humidity_pct=40.0,
+            )
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
+        first = self.client.get("/api/history/?bucket_minutes=60&limit=2").json()
+        second = self.client.get(f"/api/history/?bucket_minutes=60&limit=2&cursor={first['next_cursor']}").json()
+
+        self.assertEqual([point["temperature_c"] for point in second["points"]], [22.0])
+        self.assertFalse(second["truncated"])
+        response = self.client.get(f"/api/history/?bucket_minutes=15&cursor={first['next_cursor']}")
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_api_filters_by_absolute_range(self) -> None:
+        for day in (1, 2, 3):
+            H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075",
+                measured_at=datetime(2026, 3, day, 12, tzinfo=dt_timezone.utc),
+                temperature_c=20.0 + day,
+                humidity_pct=40.0,
+            )
+
+        payload = self.client.get("/api/history/?from=2026-03-02&to=2026-03-03T12:00:00Z").json()
+
+        self.assertEqual([point["temperature_c"] for point in payload["points"]], [22.0])
+        self.assertEqual(payload["filters"]["from"], "2026-03-02T00:00:00+00:00")
+        self.assertEqual(self.client.get("/api/history/?from=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/history/?from=2026-03-03&to=2026-03-02").status_code, 400)
+        self.assertEqual(self.client.get("/api/history/?cursor=bm90LWEtY3Vyc29y").status_code, 400)
+
+    def test_history_api_rejects_cursor_outside_the_datetime_range(self) -> None:
+        for query in ("cursor={}", "bucket_minutes=60&cursor={}"):
+            kind = "raw" if "bucket" not in query else "b60"
+            for epoch in (10**20, -(10**20)):
+                cursor = urlsafe_b64encode(f"{kind}:{epoch}:1".encode()).decode().rstrip("=")
+                response = self.client.get(f"/api/history/?{query.format(cursor)}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Invalid 'cursor'", response.json()["error"])
+
+    def test_history_api_columnar_format_groups_series_per_device(self) -> None:
+        base = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        for offset, address in enumerate(["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02", "aa:bb:cc:dd:ee:01"]):
+            H5075HistoricalMeasurement.objects.create(
+                address=address,
+                name="H5075",
+                measured_at=base + timedelta(minutes=offset),
+                temperature_c=20.0 + offset,
+                humidity_pct=40.5,
+            )
+
+        payload = self.client.get("/api/history/?format=columnar&from=2026-03-01").json()
+
+        self.assertEqual(payload["count"], 3)
+        self.assertNotIn("points", payload)
+        self.assertEqual(
+            payload["series"][0],
+            {
+                "address": "aa:bb:cc:dd:ee:01",
+                "name": "H5075",
+                "measured_at": [int(base.timestamp()), int(base.timestamp()) + 120],
+                "temperature_c": [20.0, 22.0],
+                "humidity_pct": [40.5, 40.5],
+            },
+        )
+        self.assertEqual(payload["series"][1]["temperature_c"], [21.0])
+        self.assertEqual(self.client.get("/api/history/?format=xml").status_code, 400)
+
+    def test_history_api_binary_format_encodes_typed_arrays(self) -> None:
+        base = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        for offset in range(2):
+            H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075",
+                measured_at=base + timedelta(minutes=offset),
+                temperature_c=20.5 + offset,
+                humidity_pct=40.0,
+            )
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
+        response = self.client.get("/api/history/?format=binary&bucket_minutes=1&from=2026-03-01")
+
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        body = response.content
+        (header_length,) = struct.unpack_from("<I", body)
+        header = json.loads(body[4 : 4 + header_length])
+        self.assertEqual((4 + header_length) % 8, 0)
+        self.assertEqual(
+            [column["name"] for column in header["columns"]], ["measured_at", "temperature_c", "humidity_pct", "samples"]
+        )
+        self.assertEqual(header["series"], [{"address": "aa:bb:cc:dd:ee:01", "name": "H5075", "count": 2}])
+        self.assertEqual(
+            struct.unpack_from("<2I2f2f2I", body, 4 + header_length),
+            (int(base.timestamp()), int(base.timestamp()) + 60, 20.5, 21.5, 40.0, 40.0, 1, 1),
+        )
+
+    def test_history_api_since_returns_only_rows_stored_after_watermark(self) -> None:
+        def add_row(minute: int) -> H5075HistoricalMeasurement:
+            return H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075",
+                measured_at=datetime(2026, 3, 1, 12, minute, tzinfo=dt_timezone.utc),
+                temperature_c=20.0 + minute,
+                humidity_pct=40.0,
+            )
+
+        rollup_history([add_row(0), add_row(20), add_row(40)])
+        first = self.client.get("/api/history/?from=2026-03-01").json()
+        self.assertEqual(first["count"], 3)
+
+        # A late history sync backfills a reading older than the newest one already shown.
+        rollup_history([add_row(10), add_row(50)])
+        delta = self.client.get("/api/history/", {"from": "2026-03-01", "since": first["watermark"]}).json()
+
+        self.assertEqual([point["temperature_c"] for point in delta["points"]], [30.0, 70.0])
+        self.assertGreater(delta["watermark"], first["watermark"])
+        idle = self.client.get("/api/history/", {"from": "2026-03-01", "since": delta["watermark"]}).json()
+        self.assertEqual((idle["count"], idle["watermark"]), (0, delta["watermark"]))
+
+        buckets = self.client.get(
+            "/api/history/", {"from": "2026-03-01", "bucket_minutes": 15, "since": first["watermark"]}
+        ).json()
+        self.assertEqual(
+            [(point["measured_at"], point["samples"]) for point in buckets["points"]],
+            [("2026-03-01T12:00:00+00:00", 2), ("2026-03-01T12:45:00+00:00", 1)],
+        )
+        self.assertEqual(self.client.get("/api/history/?since=later").status_code, 400)
+
+    async def test_history_export_streams_ndjson_in_chunks(self) -> None:
+        base = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        for offset in range(5):
+            await H5075HistoricalMeasurement.objects.acreate(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075_A",
+                measured_at=base + timedelta(minutes=offset),
+                temperature_c=20.0 + offset,
+                humidity_pct=40.0,
+            )
+        await H5075DeviceAlias.objects.acreate(address="aa:bb:cc:dd:ee:01", alias="Bedroom")
+
+        with patch("app.views.EXPORT_CHUNK_SIZE", 2), patch("app.views._export_page", wraps=_export_page) as page:
+            response = await self.async_client.get("/api/history/export/?from=2026-03-01T12:01:00Z")
+            self.assertTrue(response.is_async)
+            chunks = [chunk.decode() async for chunk in response.streaming_content]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(page.call_count, 3)
+        lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([line["temperature_c"] for line in lines], [21.0, 22.0, 23.0, 24.0])
+        self.assertEqual(lines[0]["name"], "Bedroom")
+        self.assertEqual(lines[0]["measured_at"], "2026-03-01T12:01:00+00:00")
+
+    async def test_history_export_streams_csv(self) -> None:
+        await H5075HistoricalMeasurement.objects.acreate(
+            address="aa:bb:cc:dd:ee:01",
+            name="H5075_A",
+            measured_at=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc),
+            temperature_c=21.5,
+            humidity_pct=45.2,
+        )
+        response = await self.async_client.get("/api/history/export/?format=csv&address=AA:BB:CC:DD:EE:01")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="h5075-history.csv"', response["Content-Disposition"])
+        self.assertEqual(
+            b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines(),
+            [
+                "address,name,measured_at,temperature_c,humidity_pct",
+                "aa:bb:cc:dd:ee:01,H5075_A,2026-03-01T12:00:00+00:00,21.5,45.2",
+            ],
+        )
+        self.assertEqual((await self.async_client.get("/api/history/export/?format=xml")).status_code, 400)
+
     def test_devices_api_lists_known_devices(self) -> None:
         H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", alias="Bedroom", detected_name="H5075_A")
 
@@ -224,6 +565,106 @@ class HistoryApiEndpointTests(TestCase):
         self.assertEqual(payload["devices"][0]["display_name"], "Bedroom")
         self.assertEqual(payload["devices"][0]["detected_name"], "H5075_A")
 
+    def test_history_api_answers_conditional_get_from_watermarks(self) -> None:
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:01",
+            name="H5075_A",
+            measured_at=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc),
+            temperature_c=21.0,
+            humidity_pct=40.0,
+        )
+        url = "/api/history/?address=AA:BB:CC:DD:EE:01&from=2026-03-01"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        with self.assertNumQueries(3):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", alias="Bedroom")
+        renamed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()["points"][0]["name"], "Bedroom")
+
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:02",
+            name="H5075_B",
+            measured_at=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc),
+            temperature_c=22.0,
+            humidity_pct=41.0,
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=renamed["ETag"]).status_code, 304)
+        self.assertNotEqual(self.client.get("/api/history/")["ETag"], first["ETag"])
+
+    def test_history_api_etag_changes_when_compaction_deletes_older_rows(self) -> None:
+        for second in (30, 0):
+            H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075_A",
+                measured_at=datetime(2026, 3, 1, 12, 0, second, tzinfo=dt_timezone.utc),
+                temperature_c=21.0,
+                humidity_pct=40.0,
+            )
+        H5075HistoricalMeasurement.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        url = "/api/history/?address=aa:bb:cc:dd:ee:01&from=2026-03-01"
+        first = self.client.get(url)
+        self.assertEqual(first.json()["count"], 2)
+
+        # The row merged away is the older insert, so the newest created_at stays the same.
+        call_command("compact_h5075_history", stdout=StringIO())
+
+        compacted = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(compacted.status_code, 200)
+        self.assertEqual(compacted.json()["count"], 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 200)
+
+    def test_history_api_serves_repeated_queries_from_cache_until_invalidated(self) -> None:
+        def add_row(address: str, minute: int) -> H5075HistoricalMeasurement:
+            return H5075HistoricalMeasurement.objects.create(
+                address=address,
+                name="H5075",
+                measured_at=datetime(2026, 3, 1, 12, minute, tzinfo=dt_timezone.utc),
+                temperature_c=20.0 + minute,
+                humidity_pct=40.0,
+            )
+
+        rollup_history([add_row("aa:bb:cc:dd:ee:01", 0), add_row("aa:bb:cc:dd:ee:02", 0)])
+        device_url = "/api/history/?address=aa:bb:cc:dd:ee:01&from=2026-03-01&bucket_minutes=15"
+        all_url = "/api/history/?from=2026-03-01"
+        self.client.get(device_url)
+        self.client.get(all_url)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(device_url).json()["count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rollup_history([add_row("aa:bb:cc:dd:ee:02", 1)])
+
+        with self.assertNumQueries(3):
+            self.client.get(device_url)
+        self.assertEqual(self.client.get(all_url).json()["count"], 3)
+        # Inserts move the created_at watermark; only deletes and rewrites bump the history versions.
+        self.assertFalse(H5075HistoryVersion.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_detected_names([SimpleNamespace(address="AA:BB:CC:DD:EE:01", name="GVH5075_A")])
+
+        payload = self.client.get(device_url).json()
+        self.assertEqual(payload["points"][0]["name"], "GVH5075_A")
+
+    def test_devices_api_answers_conditional_get_until_alias_changes(self) -> None:
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", detected_name="H5075_A")
+        first = self.client.get("/api/devices/")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/devices/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.client.force_login(self.user)
+        self.client.post("/api/devices/", {"address": "aa:bb:cc:dd:ee:01", "alias": "Bedroom"}, content_type="application/json")
+        self.assertEqual(self.client.get("/api/devices/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
     def test_devices_api_updates_alias(self) -> None:
         H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", alias="", detected_name="H5075_A")
         self.client.force_login(self.user)
@@ -264,6 +705,185 @@ class HistoryApiEndpointTests(TestCase):
         self.assertIn("'address' is required", response.json()["error"])
 
 
+class LiveEventsTests(TestCase):
+    async def test_live_events_stream_rows_stored_after_connecting(self) -> None:
+        await H5075Measurement.objects.acreate(
+            address="aa:aa:aa:aa:aa:01", name="Old", temperature_c=20.0, humidity_pct=40.0, battery_pct=90, error=False
+        )
+        broadcaster = LiveBroadcaster(notify_path="", poll_interval=0.01)
+
+        with patch("app.views.live_broadcaster", broadcaster):
+            response = await self.async_client.get("/api/live/")
+            stream = aiter(response.streaming_content)
+            try:
+                self.assertEqual(response["Content-Type"], "text/event-stream")
+                self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+
+                await H5075Measurement.objects.acreate(
+                    address="aa:aa:aa:aa:aa:01", name="Kitchen", temperature_c=21.5, humidity_pct=45.0, battery_pct=90, error=False
+                )
+                await H5075HistoricalMeasurement.objects.acreate(
+                    address="aa:aa:aa:aa:aa:01",
+                    name="Kitchen",
+                    measured_at=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc),
+                    temperature_c=21.0,
+                    humidity_pct=44.0,
+                )
+                events = [await asyncio.wait_for(anext(stream), timeout=5) for _ in range(2)]
+            finally:
+                await broadcaster.stop()
+
+        lines = [event.decode().splitlines() for event in events]
+        self.assertEqual([line[0] for line in lines], ["event: measurement", "event: history"])
+        self.assertEqual(json.loads(lines[0][2].removeprefix("data: "))["name"], "Kitchen")
+        self.assertEqual(json.loads(lines[1][2].removeprefix("data: "))["measured_at"], "2026-03-01T12:00:00+00:00")
+
+    async def test_live_events_watcher_queries_only_after_notification(self) -> None:
+        def store() -> None:
+            row = H5075Measurement(address="aa:aa:aa:aa:aa:01", name="Kitchen", temperature_c=21.5, humidity_pct=45.0, battery_pct=90)
+            with override_settings(LIVE_NOTIFY_PATH=notify_path), self.captureOnCommitCallbacks(execute=True):
+                StoreMeasurements().process([row])
+
+        with tempfile.TemporaryDirectory() as directory:
+            notify_path = os.path.join(directory, "live.notify")
+            broadcaster = LiveBroadcaster(notify_path=notify_path, poll_interval=0.01)
+            with patch.object(LiveBroadcaster, "_fetch_new", autospec=True, side_effect=LiveBroadcaster._fetch_new) as fetch:
+                subscriber = await broadcaster.subscribe()
+                try:
+                    await asyncio.sleep(0.05)
+                    self.assertEqual(fetch.call_count, 0)
+
+                    await sync_to_async(store)()
+                    event = await asyncio.wait_for(subscriber.get(), timeout=5)
+                finally:
+                    await broadcaster.stop()
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(event.startswith("event: measurement\n"))
+
+
+class H5075RollupTests(TestCase):
+    def test_rollup_bucket_minutes_prefers_coarsest_fit(self) -> None:
+        self.assertEqual(rollup_bucket_minutes_for(1440), 1440)
+        self.assertEqual(rollup_bucket_minutes_for(120), 60)
+        self.assertEqual(rollup_bucket_minutes_for(45), 15)
+        self.assertEqual(rollup_bucket_minutes_for(10), 1)
+
+    def test_epoch_seconds_refuses_backends_other_than_sqlite(self) -> None:
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:ff",
+            measured_at=datetime.fromtimestamp(HISTORY_EPOCH, tz=dt_timezone.utc),
+            temperature_c=21.0,
+            humidity_pct=45.0,
+        )
+        stamped = H5075HistoricalMeasurement.objects.annotate(epoch=EpochSeconds("measured_at"))
+        self.assertEqual(stamped.values_list("epoch", flat=True).get(), HISTORY_EPOCH)
+        with self.assertRaises(NotSupportedError):
+            EpochSeconds("measured_at").as_sql(None, SimpleNamespace(vendor="postgresql"))
+
+    def test_history_command_maintains_rollups(self) -> None:
+        points = [
+            HistoryRecord(
+                address="aa:bb:cc:dd:ee:ff",
+                name="H5075_A",
+                measured_at=HISTORY_EPOCH + minute * 60,
+                temperature_c=20.0 + minute,
+                humidity_pct=40.0,
+            )
+            for minute in range(3)
+        ]
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader(points)):
+            call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF")
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader(points)):
+            call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF")
+
+        hourly = H5075MeasurementRollup.objects.get(source="history", bucket_minutes=60)
+        self.assertEqual(hourly.samples, 3)
+        self.assertAlmostEqual(hourly.temperature_sum, 63.0)
+        self.assertAlmostEqual(hourly.temperature_min, 20.0)
+        self.assertAlmostEqual(hourly.temperature_max, 22.0)
+        self.assertEqual(H5075MeasurementRollup.objects.filter(source="history", bucket_minutes=1).count(), 3)
+
+    def test_live_command_maintains_rollups(self) -> None:
+        reading = H5075Reading(
+            address="AA:AA:AA:AA:AA:01",
+            name="H5075",
+            temperature_c=23.4,
+            humidity_pct=56.7,
+            battery_pct=85,
+            error=False,
+            rssi=-50,
+        )
+
+        with patch("app.management.commands.read_h5075.Command._scan", new=AsyncMock(return_value=[reading])):
+            call_command("read_h5075")
+
+        daily = H5075MeasurementRollup.objects.get(source="live", bucket_minutes=1440)
+        self.assertEqual(daily.address, "aa:aa:aa:aa:aa:01")
+        self.assertEqual(daily.samples, 1)
+        self.assertAlmostEqual(daily.humidity_max, 56.7)
+
+    def test_rebuild_command_matches_incremental_rollups(self) -> None:
+        base = timezone.now().replace(minute=0, second=0, microsecond=0)
+        rows = [
+            H5075HistoricalMeasurement.objects.create(
+                address="AA:BB:CC:DD:EE:01",
+                name="H5075_A",
+                measured_at=base + timedelta(minutes=minute),
+                temperature_c=20.0 + minute,
+                humidity_pct=40.0,
+            )
+            for minute in (1, 20, 40)
+        ]
+        rollup_history(rows)
+        incremental = sorted(H5075MeasurementRollup.objects.values_list("bucket_minutes", "bucket_start", "samples", "temperature_sum"))
+
+        call_command("rebuild_h5075_rollups", "--source", "history", stdout=StringIO())
+
+        rebuilt = sorted(H5075MeasurementRollup.objects.values_list("bucket_minutes", "bucket_start", "samples", "temperature_sum"))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_admin_history_edits_and_deletes_update_rollups(self) -> None:
+        base = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        rows = [
+            H5075HistoricalMeasurement.objects.create(
+                address="aa:bb:cc:dd:ee:01",
+                name="H5075_A",
+                measured_at=base + timedelta(minutes=minute),
+                temperature_c=20.0 + minute,
+                humidity_pct=40.0,
+            )
+            for minute in (0, 1)
+        ]
+        rollup_history(rows)
+        admin_user = get_user_model().objects.create_superuser(username="admin", password="secret-123")
+        self.client.force_login(admin_user)
+        change_url = f"/admin/app/h5075historicalmeasurement/{rows[1].pk}/change/"
+
+        def hourly() -> tuple[int, float]:
+            rollup = H5075MeasurementRollup.objects.get(bucket_minutes=60)
+            return rollup.samples, rollup.temperature_max
+
+        response = self.client.post(
+            change_url,
+            {
+                "address": "aa:bb:cc:dd:ee:01",
+                "name": "H5075_A",
+                "measured_at_0": "2026-03-01",
+                "measured_at_1": "12:01:00",
+                "temperature_c": "25.0",
+                "humidity_pct": "40.0",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(hourly(), (2, 25.0))
+
+        response = self.client.post(f"/admin/app/h5075historicalmeasurement/{rows[1].pk}/delete/", {"post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(hourly(), (1, 20.0))
+
+
 class H5075ParserTests(TestCase):
     def test_decode_temp_humidity_battery(self) -> None:
         payload = bytes([0x03, 0x94, 0x47, 0x55])
@@ -377,7 +997,7 @@ class ReadH5075CommandTests(TestCase):
         self.assertEqual(H5075Measurement.objects.count(), 1)
         measurement = H5075Measurement.objects.first()
         assert measurement is not None
-        self.assertEqual(measurement.address, "AA:AA:AA:AA:AA:02")
+        self.assertEqual(measurement.address, "aa:aa:aa:aa:aa:02")
         self.assertEqual(float(measurement.temperature_c), 23.4)
 
     def test_command_persists_all_by_default(self) -> None:
@@ -412,6 +1032,43 @@ class ReadH5075CommandTests(TestCase):
 
         self.assertEqual(H5075Measurement.objects.count(), 2)
 
+    def test_duplicate_detection_uses_one_query_for_all_devices(self) -> None:
+        readings = [self._reading(f"AA:AA:AA:AA:AA:0{index}", -50) for index in range(1, 6)]
+        with patch("app.management.commands.read_h5075.Command._scan", new=AsyncMock(return_value=readings)):
+            call_command("read_h5075")
+
+        with self.assertNumQueries(1):
+            latest = latest_live_values([item.address for item in readings])
+
+        self.assertEqual(len(latest), 5)
+        self.assertEqual(latest["aa:aa:aa:aa:aa:05"], reading_values(readings[4]))
+
+        with patch("app.management.commands.read_h5075.Command._scan", new=AsyncMock(return_value=readings)):
+            stderr = StringIO()
+            call_command("read_h5075", stderr=stderr)
+
+        self.assertIn("Saved 0 reading(s), skipped 5 duplicate(s)", stderr.getvalue())
+
+    def test_latest_live_rows_seek_the_address_time_index(self) -> None:
+        for temperature_c in (20.0, 21.0):
+            for address in ("aa:aa:aa:aa:aa:01", "aa:aa:aa:aa:aa:02"):
+                H5075Measurement.objects.create(
+                    address=address, name="H5075", temperature_c=temperature_c, humidity_pct=45.0, battery_pct=90
+                )
+
+        with CaptureQueriesContext(connection) as queries:
+            latest = latest_live_rows(["AA:AA:AA:AA:AA:01", "aa:aa:aa:aa:aa:02", "aa:aa:aa:aa:aa:03"])
+
+        self.assertEqual(
+            {address: row.temperature_c for address, row in latest.items()},
+            {"aa:aa:aa:aa:aa:01": 21.0, "aa:aa:aa:aa:aa:02": 21.0},
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries.captured_queries[0]['sql']}")
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("h5075_meas_address_time_idx (address=?)", plan)
+        self.assertNotIn("SCAN", plan)
+
     def test_command_uses_alias_name_when_defined(self) -> None:
         H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:01", alias="Living Room")
         reading = self._reading("AA:AA:AA:AA:AA:01", -50)
@@ -435,6 +1092,282 @@ class ReadH5075CommandTests(TestCase):
         alias = H5075DeviceAlias.objects.get(address="aa:aa:aa:aa:aa:09")
         self.assertEqual(alias.detected_name, "H5075")
 
+    def test_detected_names_are_upserted_in_bulk(self) -> None:
+        H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:01", alias="Kitchen", detected_name="GVH5075_OLD")
+        H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:02", detected_name="GVH5075_B")
+        devices = [
+            SimpleNamespace(address="AA:AA:AA:AA:AA:01", name="GVH5075_A"),
+            SimpleNamespace(address="aa:aa:aa:aa:aa:01", name="GVH5075_A"),
+            SimpleNamespace(address="AA:AA:AA:AA:AA:02", name="GVH5075_B"),
+            SimpleNamespace(address="AA:AA:AA:AA:AA:03", name=" GVH5075_C "),
+        ]
+
+        with self.assertNumQueries(2):
+            self.assertEqual(upsert_detected_names(devices), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(upsert_detected_names(devices), 0)
+
+        self.assertEqual(
+            dict(H5075DeviceAlias.objects.values_list("address", "detected_name")),
+            {"aa:aa:aa:aa:aa:01": "GVH5075_A", "aa:aa:aa:aa:aa:02": "GVH5075_B", "aa:aa:aa:aa:aa:03": "GVH5075_C"},
+        )
+        self.assertEqual(H5075DeviceAlias.objects.get(address="aa:aa:aa:aa:aa:01").alias, "Kitchen")
+
+
+class IngestPipelineTests(TestCase):
+    def test_pipeline_stages_are_swappable_and_record_metrics(self) -> None:
+        readings = [
+            H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075_A", 21.5, 45.0, 90, False, -50),
+            H5075Reading("AA:AA:AA:AA:AA:02", "GVH5075_B", 22.5, 46.0, 80, False, -60),
+            H5075Reading("AA:AA:AA:AA:AA:03", "GVH5075_C", 23.5, 47.0, 70, True, -70),
+        ]
+        pipeline = IngestPipeline(
+            [
+                FunctionStage("no-errors", lambda items: [item for item in items if not item.error]),
+                AttachNames(),
+                DropUnchanged(),
+                StoreMeasurements(),
+            ]
+        )
+
+        saved = pipeline.run(readings)
+        pipeline.run(readings[:1])
+
+        self.assertEqual([row.address for row in saved], ["aa:aa:aa:aa:aa:01", "aa:aa:aa:aa:aa:02"])
+        self.assertEqual(H5075Measurement.objects.count(), 2)
+        self.assertEqual(pipeline.metrics["no-errors"].dropped, 1)
+        self.assertEqual(pipeline.metrics["dedupe"].received, 3)
+        self.assertEqual(pipeline.metrics["dedupe"].dropped, 1)
+        self.assertEqual(pipeline.metrics["store"].emitted, 2)
+        self.assertIn("store 2->2 in", pipeline.format_metrics())
+
+    def test_deadbands_suppress_small_changes_against_last_stored_reading(self) -> None:
+        dedupe = DropUnchanged(ChangePolicy(temperature_c=0.2, humidity_pct=1.0, battery_pct=5))
+        pipeline = IngestPipeline([AttachNames(), dedupe, StoreMeasurements()])
+
+        def reading(temperature_c: float, humidity_pct: float = 45.0, battery_pct: int = 90) -> H5075Reading:
+            return H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075", temperature_c, humidity_pct, battery_pct, False)
+
+        pipeline.run([reading(21.0)])
+        pipeline.run([reading(21.1)])
+        pipeline.run([reading(21.2)])
+        pipeline.run([reading(21.3)])
+        pipeline.run([reading(21.3, humidity_pct=45.9, battery_pct=86)])
+        pipeline.run([reading(21.3, humidity_pct=46.1)])
+
+        stored = list(H5075Measurement.objects.order_by("id").values_list("temperature_c", "humidity_pct"))
+        self.assertEqual(
+            stored,
+            [
+                (21.0, 45.0),
+                (21.3, 45.0),
+                (21.3, 46.1),
+            ],
+        )
+
+    def test_change_policy_compares_integer_hundredths(self) -> None:
+        policy = ChangePolicy(temperature_c=0.1)
+        previous = reading_values(H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075", 21.2, 45.0, 90, False))
+        current = reading_values(H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075", 21.3, 45.0, 90, False))
+
+        self.assertEqual(current, (2130, 4500, 90, False))
+        # 21.3 - 21.2 is slightly above 0.1 in floats; in hundredths it is exactly the deadband.
+        self.assertFalse(policy.is_change(previous, current))
+
+    def test_device_alias_deadbands_override_the_default_policy(self) -> None:
+        H5075DeviceAlias.objects.create(address="AA:AA:AA:AA:AA:02", temperature_deadband=0.5)
+        pipeline = IngestPipeline([AttachNames(), DropUnchanged(ChangePolicy(temperature_c=0.1)), StoreMeasurements()])
+
+        for temperature_c in (21.0, 21.3, 21.6):
+            pipeline.run(
+                [
+                    H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075", temperature_c, 45.0, 90, False),
+                    H5075Reading("AA:AA:AA:AA:AA:02", "GVH5075", temperature_c, 45.0, 90, False),
+                ]
+            )
+
+        stored = H5075Measurement.objects.order_by("address", "id").values_list("address", "temperature_c")
+        self.assertEqual(
+            list(stored),
+            [
+                ("aa:aa:aa:aa:aa:01", 21.0),
+                ("aa:aa:aa:aa:aa:01", 21.3),
+                ("aa:aa:aa:aa:aa:01", 21.6),
+                ("aa:aa:aa:aa:aa:02", 21.0),
+                ("aa:aa:aa:aa:aa:02", 21.6),
+            ],
+        )
+
+    def test_heartbeat_stores_unchanged_reading_after_interval(self) -> None:
+        H5075Measurement.objects.create(
+            address="AA:AA:AA:AA:AA:01", name="GVH5075", temperature_c=21.0, humidity_pct=45.0, battery_pct=90, error=False
+        )
+        H5075Measurement.objects.update(created_at=timezone.now() - timedelta(minutes=11))
+        reading = H5075Reading("AA:AA:AA:AA:AA:01", "GVH5075", 21.0, 45.0, 90, False)
+
+        with patch("app.management.commands.read_h5075.Command._scan", new=AsyncMock(return_value=[reading])):
+            call_command("read_h5075", "--heartbeat", "600", stderr=StringIO())
+            call_command("read_h5075", "--heartbeat", "600", stderr=StringIO())
+
+        self.assertEqual(H5075Measurement.objects.count(), 2)
+
+    def test_pipeline_rejects_duplicate_stage_names(self) -> None:
+        with self.assertRaises(ValueError):
+            IngestPipeline([DropUnchanged(), DropUnchanged()])
+
+
+class FakeBleakScanner:
+    """Stand-in for bleak.BleakScanner that replays advertisements to the detection callback."""
+
+    advertisements: list[tuple[SimpleNamespace, SimpleNamespace]] = []
+
+    def __init__(self, detection_callback) -> None:
+        self.detection_callback = detection_callback
+        self.replay: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        async def replay() -> None:
+            for device, advertisement in FakeBleakScanner.advertisements:
+                await asyncio.sleep(0.01)
+                self.detection_callback(device, advertisement)
+
+        self.replay = asyncio.ensure_future(replay())
+
+    async def stop(self) -> None:
+        if self.replay is not None:
+            self.replay.cancel()
+
+
+def fake_advertisement(address: str, payload: bytes = bytes([0x00, 0x03, 0x94, 0x47, 0x55, 0x00])) -> tuple:
+    device = SimpleNamespace(address=address, name="GVH5075")
+    advertisement = SimpleNamespace(
+        local_name="GVH5075",
+        rssi=-60,
+        manufacturer_data={GOVEE_H5075_MFR_ID: payload},
+        service_uuids=[],
+    )
+    return device, advertisement
+
+
+class EarlyExitScanTests(TestCase):
+    def test_scan_stops_once_expected_devices_reported(self) -> None:
+        FakeBleakScanner.advertisements = [
+            fake_advertisement("AA:AA:AA:AA:AA:01"),
+            fake_advertisement("AA:AA:AA:AA:AA:02"),
+        ]
+        H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:01")
+        H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:02")
+
+        started = time.monotonic()
+        with patch("bleak.BleakScanner", new=FakeBleakScanner):
+            call_command("read_h5075", "--timeout", "5", stdout=StringIO(), stderr=StringIO())
+
+        self.assertLess(time.monotonic() - started, 2.0)
+        self.assertEqual(H5075Measurement.objects.count(), 2)
+
+    def test_scan_keeps_latest_advertisement_per_device(self) -> None:
+        FakeBleakScanner.advertisements = [
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x47, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x48, 0x55, 0x00])),
+        ]
+
+        with patch("bleak.BleakScanner", new=FakeBleakScanner):
+            call_command("read_h5075_dump", "--timeout", "0.2", stdout=StringIO(), stderr=StringIO())
+
+        snapshot = H5075AdvertisementSnapshot.objects.get()
+        self.assertEqual(snapshot.payload_hex, "000394485500")
+
+    def test_full_scan_waits_for_timeout(self) -> None:
+        FakeBleakScanner.advertisements = [fake_advertisement("AA:AA:AA:AA:AA:01")]
+
+        started = time.monotonic()
+        with patch("bleak.BleakScanner", new=FakeBleakScanner):
+            call_command(
+                "read_h5075", "--mac", "AA:AA:AA:AA:AA:01", "--timeout", "0.3", "--full-scan", stdout=StringIO(), stderr=StringIO()
+            )
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+
+class CollectH5075CommandTests(TestCase):
+    def test_collector_stores_changed_readings_and_skips_repeats(self) -> None:
+        FakeBleakScanner.advertisements = [
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x47, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x47, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x48, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:02"),
+        ]
+        H5075DeviceAlias.objects.create(address="aa:aa:aa:aa:aa:01", alias="Kitchen")
+        stderr = StringIO()
+
+        with patch("bleak.BleakScanner", new=FakeBleakScanner):
+            call_command(
+                "collect_h5075", "--duration", "0.3", "--flush-interval", "0", stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertEqual(H5075Measurement.objects.count(), 3)
+        self.assertEqual(H5075Measurement.objects.filter(name="Kitchen").count(), 2)
+        self.assertIn("Saved 3 reading(s), skipped 1 duplicate(s), coalesced 0 advertisement(s)", stderr.getvalue())
+        self.assertEqual(
+            H5075MeasurementRollup.objects.get(
+                source=H5075MeasurementRollup.SOURCE_LIVE, address="aa:aa:aa:aa:aa:01", bucket_minutes=1440
+            ).samples,
+            2,
+        )
+
+    def test_collector_coalesces_advertisements_into_one_batch(self) -> None:
+        FakeBleakScanner.advertisements = [
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x47, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:02"),
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x48, 0x55, 0x00])),
+            fake_advertisement("AA:AA:AA:AA:AA:01", bytes([0x00, 0x03, 0x94, 0x49, 0x55, 0x00])),
+        ]
+        stderr = StringIO()
+
+        with patch("bleak.BleakScanner", new=FakeBleakScanner), patch(
+            "app.management.commands.collect_h5075.H5075Measurement.objects.bulk_create",
+            wraps=H5075Measurement.objects.bulk_create,
+        ) as bulk_create:
+            call_command("collect_h5075", "--duration", "0.3", stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertIn("Saved 2 reading(s), skipped 0 duplicate(s), coalesced 2 advertisement(s)", stderr.getvalue())
+        latest = H5075Measurement.objects.get(address="aa:aa:aa:aa:aa:01")
+        self.assertEqual(latest.humidity_pct, 56.9)
+
+    def test_latest_reading_buffer_flushes_on_size(self) -> None:
+        buffer = LatestReadingBuffer(max_size=2, max_age=60)
+        buffer.add(H5075Reading("AA:01", "H5075", 20.0, 40.0, 90, False))
+        buffer.add(H5075Reading("aa:01", "H5075", 21.0, 40.0, 90, False))
+        self.assertFalse(buffer.should_flush())
+
+        buffer.add(H5075Reading("AA:02", "H5075", 22.0, 40.0, 90, False))
+        self.assertTrue(buffer.should_flush())
+        self.assertEqual([item.temperature_c for item in buffer.drain()], [21.0, 22.0])
+        self.assertEqual(buffer.coalesced, 1)
+        self.assertFalse(buffer.should_flush())
+
+    def test_collector_restarts_scanner_after_errors(self) -> None:
+        class FlakyScanner(FakeBleakScanner):
+            starts = 0
+
+            async def start(self) -> None:
+                FlakyScanner.starts += 1
+                if FlakyScanner.starts == 1:
+                    raise RuntimeError("adapter busy")
+                await super().start()
+
+        FakeBleakScanner.advertisements = [fake_advertisement("AA:AA:AA:AA:AA:01")]
+        stderr = StringIO()
+
+        with patch("bleak.BleakScanner", new=FlakyScanner):
+            call_command(
+                "collect_h5075", "--duration", "0.5", "--restart-delay", "0", stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertIn("Bluetooth scanner failed: adapter busy", stderr.getvalue())
+        self.assertEqual(H5075Measurement.objects.count(), 1)
+
 
 class ReadH5075HardwareCommandTests(TestCase):
     def test_bluetooth_permissions_allow_scan(self) -> None:
@@ -547,30 +1480,29 @@ class ReadH5075DumpCommandTests(TestCase):
 class ReadH5075HistoryCommandTests(TestCase):
     def test_history_command_defaults_to_all_devices(self) -> None:
         points_a = [
-            HistoryPoint(
+            HistoryRecord(
                 address="AA:BB:CC:DD:EE:01",
                 name="H5075_A",
-                measured_at="2026-02-20T10:00:00+00:00",
+                measured_at=HISTORY_EPOCH,
                 temperature_c=21.1,
                 humidity_pct=45.2,
             )
         ]
         points_b = [
-            HistoryPoint(
+            HistoryRecord(
                 address="AA:BB:CC:DD:EE:02",
                 name="H5075_B",
-                measured_at="2026-02-20T10:00:00+00:00",
+                measured_at=HISTORY_EPOCH,
                 temperature_c=19.5,
                 humidity_pct=50.1,
             )
         ]
 
-        async def fake_read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float) -> list[HistoryPoint]:
-            if mac == "aa:bb:cc:dd:ee:01":
-                return points_a
-            if mac == "aa:bb:cc:dd:ee:02":
-                return points_b
-            return []
+        async def fake_read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+            records = {"aa:bb:cc:dd:ee:01": points_a, "aa:bb:cc:dd:ee:02": points_b}.get(mac, [])
+            for record in records:
+                sink(record)
+            return len(records)
 
         with patch(
             "app.management.commands.read_h5075_history.Command._discover_targets",
@@ -585,54 +1517,57 @@ class ReadH5075HistoryCommandTests(TestCase):
 
     def test_history_command_saves_records(self) -> None:
         points = [
-            HistoryPoint(
+            HistoryRecord(
                 address="AA:BB:CC:DD:EE:FF",
                 name="H5075_A",
-                measured_at="2026-02-20T10:00:00+00:00",
+                measured_at=HISTORY_EPOCH,
                 temperature_c=21.1,
                 humidity_pct=45.2,
             ),
-            HistoryPoint(
+            HistoryRecord(
                 address="AA:BB:CC:DD:EE:FF",
                 name="H5075_A",
-                measured_at="2026-02-20T10:01:00+00:00",
+                measured_at=HISTORY_EPOCH + 60,
                 temperature_c=21.2,
                 humidity_pct=45.3,
             ),
         ]
 
-        with patch("app.management.commands.read_h5075_history.Command._read_history", new=AsyncMock(return_value=points)):
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader(points)), patch(
+            "app.management.commands.read_h5075_history.invalidate_history_cache"
+        ) as invalidate:
             call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF")
 
         self.assertEqual(H5075HistoricalMeasurement.objects.count(), 2)
+        self.assertEqual(list(invalidate.call_args.args[0]), ["aa:bb:cc:dd:ee:ff", "aa:bb:cc:dd:ee:ff"])
 
     def test_history_command_skips_duplicates(self) -> None:
-        point = HistoryPoint(
+        point = HistoryRecord(
             address="AA:BB:CC:DD:EE:FF",
             name="H5075_A",
-            measured_at="2026-02-20T10:00:00+00:00",
+            measured_at=HISTORY_EPOCH,
             temperature_c=21.1,
             humidity_pct=45.2,
         )
 
-        with patch("app.management.commands.read_h5075_history.Command._read_history", new=AsyncMock(return_value=[point])):
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader([point])):
             call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF")
 
-        with patch("app.management.commands.read_h5075_history.Command._read_history", new=AsyncMock(return_value=[point])):
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader([point])):
             call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF")
 
         self.assertEqual(H5075HistoricalMeasurement.objects.count(), 1)
 
     def test_history_command_json_output(self) -> None:
-        point = HistoryPoint(
+        point = HistoryRecord(
             address="AA:BB:CC:DD:EE:FF",
             name="H5075_A",
-            measured_at="2026-02-20T10:00:00+00:00",
+            measured_at=HISTORY_EPOCH,
             temperature_c=21.1,
             humidity_pct=45.2,
         )
 
-        with patch("app.management.commands.read_h5075_history.Command._read_history", new=AsyncMock(return_value=[point])):
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader([point])):
             stdout = StringIO()
             call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--json", stdout=stdout)
 
@@ -641,6 +1576,467 @@ class ReadH5075HistoryCommandTests(TestCase):
         self.assertEqual(payload[0]["address"], "AA:BB:CC:DD:EE:FF")
 
 
+    def _run_with_fake_client(self, *args: str) -> None:
+        FakeBleakClient.active = 0
+        FakeBleakClient.max_active = 0
+        FakeBleakClient.connections = 0
+        FakeBleakClient.send_completion = True
+        self.addCleanup(setattr, FakeBleakClient, "send_completion", True)
+        with patch(
+            "app.management.commands.read_h5075_history.Command._create_client",
+            new=FakeBleakClient,
+        ):
+            call_command("read_h5075_history", *args, stderr=StringIO())
+
+    def test_history_command_reads_fake_client_notifications(self) -> None:
+        self._run_with_fake_client("--mac", "AA:BB:CC:DD:EE:01", "--backoff", "0")
+
+        rows = list(H5075HistoricalMeasurement.objects.order_by("measured_at"))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0].name, "H5075_FAKE")
+        self.assertAlmostEqual(float(rows[0].temperature_c), 21.5)
+        self.assertAlmostEqual(float(rows[0].humidity_pct), 45.2)
+        self.assertTrue(all(row.measured_at.second == 0 and row.measured_at.microsecond == 0 for row in rows))
+
+    def test_history_command_repeated_sync_produces_identical_timestamps(self) -> None:
+        self._run_with_fake_client("--mac", "AA:BB:CC:DD:EE:01", "--full")
+        self._run_with_fake_client("--mac", "AA:BB:CC:DD:EE:01", "--full")
+
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 4)
+
+    def test_history_command_limits_concurrent_connections(self) -> None:
+        targets = [f"aa:bb:cc:dd:ee:0{index}" for index in range(4)]
+
+        with patch(
+            "app.management.commands.read_h5075_history.Command._discover_targets",
+            new=AsyncMock(return_value=targets),
+        ):
+            self._run_with_fake_client("--concurrency", "2", "--backoff", "0")
+
+        self.assertEqual(FakeBleakClient.max_active, 2)
+        self.assertEqual(H5075HistoricalMeasurement.objects.values("address").distinct().count(), 4)
+
+    def test_history_command_retries_failed_device_with_backoff(self) -> None:
+        FakeBleakClient.connect_failures = {"aa:bb:cc:dd:ee:01": 2}
+        sleep = AsyncMock()
+
+        with patch("app.management.commands.read_h5075_history.asyncio.sleep", new=sleep):
+            self._run_with_fake_client("--mac", "AA:BB:CC:DD:EE:01", "--retries", "2", "--backoff", "0.5")
+
+        # The fake client's own 0.01 s transfer delay is awaited through the same patched sleep.
+        self.assertEqual([call.args[0] for call in sleep.await_args_list if call.args[0] != 0.01], [0.5, 1.0])
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 4)
+
+    def test_history_command_persists_in_batches(self) -> None:
+        records = [
+            HistoryRecord(
+                address="aa:bb:cc:dd:ee:ff",
+                name="H5075_A",
+                measured_at=HISTORY_EPOCH + minute * 60,
+                temperature_c=21.0,
+                humidity_pct=45.0,
+            )
+            for minute in range(5)
+        ]
+        batch_sizes: list[int] = []
+        original = ReadHistoryCommand._persist_batch
+
+        def spy(command: ReadHistoryCommand, batch: list[HistoryRecord]) -> int:
+            if batch:
+                batch_sizes.append(len(batch))
+            return original(command, batch)
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=history_reader(records)), patch(
+            "app.management.commands.read_h5075_history.Command._persist_batch", new=spy
+        ):
+            call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--batch-size", "2", stdout=StringIO())
+
+        self.assertEqual(batch_sizes, [2, 2, 1])
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 5)
+
+    def test_history_command_keeps_records_received_before_failure(self) -> None:
+        async def failing_read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+            for minute in range(3):
+                sink(
+                    HistoryRecord(
+                        address=mac,
+                        name="H5075_A",
+                        measured_at=HISTORY_EPOCH + minute * 60,
+                        temperature_c=21.0,
+                        humidity_pct=45.0,
+                    )
+                )
+            raise RuntimeError("disconnected")
+
+        stderr = StringIO()
+        with patch(
+            "app.management.commands.read_h5075_history.Command._read_history",
+            new=AsyncMock(side_effect=failing_read_history),
+        ):
+            call_command(
+                "read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--retries", "0", stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 3)
+        self.assertIn("disconnected", stderr.getvalue())
+
+    def test_history_command_resumes_after_disconnect(self) -> None:
+        clock = [timezone.now().replace(second=30, microsecond=0)]
+        first_reference = int(clock[0].replace(second=0).timestamp())
+        calls: list[int] = []
+
+        async def flaky_read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+            reference = ReadHistoryCommand._minute_reference()
+            window_start = ReadHistoryCommand._window_start(start_minutes, since, reference)
+            calls.append(window_start)
+            first, last = (window_start, 50) if len(calls) == 1 else (window_start, end_minutes)
+            for minutes_back in range(first, last - 1, -1):
+                sink(
+                    HistoryRecord(
+                        address=mac,
+                        name="H5075_A",
+                        measured_at=reference - minutes_back * 60,
+                        temperature_c=21.0,
+                        humidity_pct=45.0,
+                    )
+                )
+            if len(calls) == 1:
+                # The reconnect happens five minutes later.
+                clock[0] += timedelta(minutes=5)
+                raise RuntimeError("disconnected")
+            return first - last + 1
+
+        with patch("app.management.commands.read_h5075_history.timezone.now", side_effect=lambda: clock[0]), patch(
+            "app.management.commands.read_h5075_history.Command._read_history",
+            new=AsyncMock(side_effect=flaky_read_history),
+        ):
+            call_command(
+                "read_h5075_history",
+                "--mac",
+                "AA:BB:CC:DD:EE:FF",
+                "--start",
+                "100",
+                "--backoff",
+                "0",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        # The resumed read starts at the newest record received before the disconnect, 50 + 5 minutes back.
+        self.assertEqual(calls, [100, 55])
+        stored = list(H5075HistoricalMeasurement.objects.order_by("measured_at").values_list("measured_at", flat=True))
+        self.assertEqual(len(stored), 106)
+        self.assertEqual(int(stored[0].timestamp()), first_reference - 100 * 60)
+        self.assertEqual(int(stored[-1].timestamp()), first_reference + 5 * 60)
+
+    def test_history_command_timeout_after_all_records_needs_no_reconnect(self) -> None:
+        FakeBleakClient.connect_failures = {}
+        FakeBleakClient.connections = 0
+        FakeBleakClient.send_completion = False
+        self.addCleanup(setattr, FakeBleakClient, "send_completion", True)
+
+        with patch(
+            "app.management.commands.read_h5075_history.Command._create_client",
+            new=FakeBleakClient,
+        ):
+            call_command(
+                "read_h5075_history",
+                "--mac",
+                "AA:BB:CC:DD:EE:01",
+                "--timeout",
+                "0.05",
+                "--backoff",
+                "0",
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        self.assertEqual(FakeBleakClient.connections, 1)
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 4)
+
+    def test_history_command_known_mode_skips_discovery(self) -> None:
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", detected_name="H5075_A")
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:02", detected_name="H5075_B")
+        point = HistoryRecord(
+            address="aa:bb:cc:dd:ee:01",
+            name="H5075_A",
+            measured_at=HISTORY_EPOCH,
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        discover = AsyncMock(return_value=[])
+        read_history = history_reader([point])
+
+        with patch("app.management.commands.read_h5075_history.Command._discover_targets", new=discover), patch(
+            "app.management.commands.read_h5075_history.Command._read_history", new=read_history
+        ):
+            call_command("read_h5075_history", "--known", stdout=StringIO(), stderr=StringIO())
+
+        discover.assert_not_awaited()
+        self.assertEqual(
+            sorted(call.kwargs["mac"] for call in read_history.await_args_list), ["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02"]
+        )
+
+    def test_history_command_known_mode_scans_for_unreachable_devices(self) -> None:
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", detected_name="H5075_A")
+        attempts: list[str] = []
+
+        async def read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+            attempts.append(mac)
+            if attempts.count(mac) == 1 and mac == "aa:bb:cc:dd:ee:01":
+                raise RuntimeError("out of range")
+            sink(HistoryRecord(address=mac, name="H5075", measured_at=HISTORY_EPOCH, temperature_c=21.0, humidity_pct=45.0))
+            return 1
+
+        with patch(
+            "app.management.commands.read_h5075_history.Command._discover_targets",
+            new=AsyncMock(return_value=["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:09"]),
+        ), patch(
+            "app.management.commands.read_h5075_history.Command._read_history",
+            new=AsyncMock(side_effect=read_history),
+        ):
+            call_command("read_h5075_history", "--known", "--retries", "0", stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(sorted(attempts), ["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:09"])
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 2)
+
+    def test_history_command_fallback_scan_skips_known_devices_left_out(self) -> None:
+        for suffix, days_ago in (("01", 1), ("02", 30)):
+            H5075DeviceAlias.objects.create(address=f"aa:bb:cc:dd:ee:{suffix}", detected_name="H5075")
+            H5075HistoricalMeasurement.objects.create(
+                address=f"aa:bb:cc:dd:ee:{suffix}",
+                name="H5075",
+                measured_at=timezone.now() - timedelta(days=days_ago),
+                temperature_c=21.1,
+                humidity_pct=45.2,
+            )
+        read_history = AsyncMock(side_effect=RuntimeError("out of range"))
+
+        # 02 was filtered out by --seen-within-days; only the unreachable 01 and the unknown 09 are read.
+        with patch(
+            "app.management.commands.read_h5075_history.Command._discover_targets",
+            new=AsyncMock(return_value=["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02", "aa:bb:cc:dd:ee:09"]),
+        ), patch("app.management.commands.read_h5075_history.Command._read_history", new=read_history):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "read_h5075_history", "--known", "--seen-within-days", "7", "--retries", "0", stderr=StringIO()
+                )
+
+        self.assertEqual(
+            sorted(call.kwargs["mac"] for call in read_history.await_args_list),
+            ["aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:09"],
+        )
+
+    def test_history_command_known_mode_filters_by_last_seen(self) -> None:
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:01", detected_name="H5075_A")
+        H5075DeviceAlias.objects.create(address="aa:bb:cc:dd:ee:02", detected_name="H5075_B")
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:01",
+            name="H5075_A",
+            measured_at=timezone.now() - timedelta(days=1),
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:02",
+            name="H5075_B",
+            measured_at=timezone.now() - timedelta(days=30),
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        read_history = AsyncMock(return_value=0)
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=read_history):
+            with self.assertRaises(CommandError):
+                call_command("read_h5075_history", "--known", "--seen-within-days", "7", stderr=StringIO())
+
+        self.assertEqual([call.kwargs["mac"] for call in read_history.await_args_list], ["aa:bb:cc:dd:ee:01"])
+
+    def test_history_command_requests_only_missing_minutes(self) -> None:
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:ff",
+            name="H5075_A",
+            measured_at=timezone.now() - timedelta(minutes=30),
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        latest = H5075HistoricalMeasurement.objects.get().measured_at
+        read_history = AsyncMock(return_value=[])
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=read_history):
+            with self.assertRaises(CommandError):
+                call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--overlap", "5")
+
+        self.assertEqual(read_history.await_args.kwargs["since"], int(latest.timestamp()) - 5 * 60)
+
+    def test_history_command_window_reaches_watermark_when_read_later(self) -> None:
+        clock = [timezone.now().replace(second=0, microsecond=0)]
+        for suffix in ("01", "02"):
+            H5075DeviceAlias.objects.create(address=f"aa:bb:cc:dd:ee:{suffix}", detected_name="H5075")
+            H5075HistoricalMeasurement.objects.create(
+                address=f"aa:bb:cc:dd:ee:{suffix}",
+                name="H5075",
+                measured_at=clock[0] - timedelta(minutes=30),
+                temperature_c=21.1,
+                humidity_pct=45.2,
+            )
+        requested: dict[str, int] = {}
+
+        async def slow_read_history(mac: str, start_minutes: int, end_minutes: int, timeout: float, sink, since: int | None = None) -> int:
+            requested[mac] = ReadHistoryCommand._window_start(start_minutes, since, ReadHistoryCommand._minute_reference())
+            # Each device takes 20 minutes, longer than the overlap.
+            clock[0] += timedelta(minutes=20)
+            return 0
+
+        with patch("app.management.commands.read_h5075_history.timezone.now", side_effect=lambda: clock[0]), patch(
+            "app.management.commands.read_h5075_history.Command._read_history", new=AsyncMock(side_effect=slow_read_history)
+        ):
+            with self.assertRaises(CommandError):
+                call_command("read_h5075_history", "--known", "--overlap", "5", stderr=StringIO())
+
+        # The device read second still reaches back to 5 minutes before its newest stored record.
+        self.assertEqual(requested, {"aa:bb:cc:dd:ee:01": 35, "aa:bb:cc:dd:ee:02": 55})
+
+    def test_history_command_full_ignores_stored_watermark(self) -> None:
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:ff",
+            name="H5075_A",
+            measured_at=timezone.now() - timedelta(minutes=30),
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        read_history = AsyncMock(return_value=[])
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=read_history):
+            with self.assertRaises(CommandError):
+                call_command("read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--full")
+
+        self.assertEqual(read_history.await_args.kwargs["start_minutes"], 28800)
+        self.assertIsNone(read_history.await_args.kwargs["since"])
+
+    def test_history_command_skips_device_already_up_to_date(self) -> None:
+        H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:ff",
+            name="H5075_A",
+            measured_at=timezone.now(),
+            temperature_c=21.1,
+            humidity_pct=45.2,
+        )
+        read_history = AsyncMock(return_value=[])
+
+        with patch("app.management.commands.read_h5075_history.Command._read_history", new=read_history):
+            call_command(
+                "read_h5075_history", "--mac", "AA:BB:CC:DD:EE:FF", "--end", "1:00", "--overlap", "0", stderr=StringIO()
+            )
+
+        read_history.assert_not_awaited()
+
+    def test_history_command_windows_seek_the_newest_record_per_device(self) -> None:
+        for address in ("aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02"):
+            H5075HistoricalMeasurement.objects.create(
+                address=address, name="H5075", measured_at=timezone.now(), temperature_c=21.1, humidity_pct=45.2
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            ReadHistoryCommand._incremental_windows(["AA:BB:CC:DD:EE:01", "aa:bb:cc:dd:ee:02"], 60, 0, 0)
+
+        self.assertEqual(len(queries.captured_queries), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries.captured_queries[0]['sql']}")
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        # The unique (address, measured_at) constraint is SQLite's autoindex on that table.
+        self.assertIn("COVERING INDEX sqlite_autoindex_app_h5075historicalmeasurement_1 (address=?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class FakeBleakClient:
+    """Stand-in for bleak.BleakClient that replays one history packet per connection."""
+
+    active = 0
+    max_active = 0
+    connections = 0
+    send_completion = True
+    connect_failures: dict[str, int] = {}
+
+    def __init__(self, mac: str, timeout: float) -> None:
+        self.mac = mac
+        self.is_connected = False
+        self.handlers: dict[str, object] = {}
+
+    async def __aenter__(self) -> "FakeBleakClient":
+        remaining_failures = FakeBleakClient.connect_failures.get(self.mac, 0)
+        if remaining_failures:
+            FakeBleakClient.connect_failures[self.mac] = remaining_failures - 1
+            raise RuntimeError("connection refused")
+
+        FakeBleakClient.active += 1
+        FakeBleakClient.connections += 1
+        FakeBleakClient.max_active = max(FakeBleakClient.max_active, FakeBleakClient.active)
+        self.is_connected = True
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        FakeBleakClient.active -= 1
+        self.is_connected = False
+
+    async def read_gatt_char(self, uuid: str) -> bytes:
+        return b"H5075_FAKE"
+
+    async def start_notify(self, uuid: str, handler) -> None:
+        self.handlers[uuid] = handler
+
+    async def stop_notify(self, uuid: str) -> None:
+        self.handlers.pop(uuid, None)
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        await asyncio.sleep(0.01)
+        # 21.5 °C / 45.2 % encoded as 215452 in three big-endian bytes; minutes_back 3 counts down to 0 (2 unused slots).
+        record = (215452).to_bytes(3, "big")
+        packet = bytearray((3).to_bytes(2, "big")) + record * 4 + b"\xff\xff\xff" * 2
+        self.handlers[ReadHistoryCommand.UUID_DATA](None, packet)
+        if FakeBleakClient.send_completion:
+            self.handlers[ReadHistoryCommand.UUID_COMMAND](None, bytearray(ReadHistoryCommand.RECORDS_TX_COMPLETED))
+
+
+class CompactH5075HistoryCommandTests(TestCase):
+    def _create(self, measured_at, temperature_c: float = 21.0) -> H5075HistoricalMeasurement:
+        return H5075HistoricalMeasurement.objects.create(
+            address="aa:bb:cc:dd:ee:01",
+            name="H5075_A",
+            measured_at=measured_at,
+            temperature_c=temperature_c,
+            humidity_pct=45.0,
+        )
+
+    def test_compaction_merges_near_duplicates_onto_minute_grid(self) -> None:
+        minute = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        kept = self._create(minute + timedelta(seconds=7, microseconds=120), temperature_c=21.0)
+        self._create(minute + timedelta(seconds=41), temperature_c=21.0)
+        self._create(minute + timedelta(minutes=1), temperature_c=22.0)
+        rollup_history(H5075HistoricalMeasurement.objects.all())
+
+        stdout = StringIO()
+        call_command("compact_h5075_history", stdout=stdout)
+
+        self.assertIn("Merged 1 duplicate(s) and snapped 1 timestamp(s)", stdout.getvalue())
+        rows = list(H5075HistoricalMeasurement.objects.order_by("measured_at"))
+        self.assertEqual([row.measured_at for row in rows], [minute, minute + timedelta(minutes=1)])
+        self.assertEqual(rows[0].id, kept.id)
+        daily = H5075MeasurementRollup.objects.filter(source="history", bucket_minutes=1440)
+        self.assertEqual(sum(daily.values_list("samples", flat=True)), 2)
+
+    def test_compaction_dry_run_changes_nothing(self) -> None:
+        minute = timezone.now().replace(second=0, microsecond=0) - timedelta(hours=1)
+        self._create(minute + timedelta(seconds=7))
+        self._create(minute + timedelta(seconds=41))
+
+        stdout = StringIO()
+        call_command("compact_h5075_history", "--dry-run", stdout=stdout)
+
+        self.assertIn("Would merge 1 duplicate(s)", stdout.getvalue())
+        self.assertEqual(H5075HistoricalMeasurement.objects.count(), 2)
+
+
 class SyncH5075HistoryCommandTests(TestCase):
     def test_sync_runs_when_never_succeeded(self) -> None:
         with patch("app.management.commands.sync_h5075_history.call_command") as mocked_call:
@@ -12,5 +12,7 @@ urlpatterns = [
     path("api/auth/login/", views.auth_login),
     path("api/auth/logout/", views.auth_logout),
     path("api/history/", views.history_values),
+    path("api/history/export/", views.history_export),
     path("api/devices/", views.devices),
+    path("api/live/", views.live_events),
 ]
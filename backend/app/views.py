@@ -1,14 +1,33 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime, timedelta, timezone as dt_timezone
+import asyncio
+import binascii
+import csv
+import hashlib
+import io
 import json
+import math
+import struct
+import sys
+from array import array
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, logout
-from django.http import HttpRequest, JsonResponse
+from django.db.models import Count, F, Max, Q, Sum
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.middleware.csrf import get_token
+from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import condition, require_GET, require_POST
 
-from app.models import H5075DeviceAlias, H5075HistoricalMeasurement
+from app.db_functions import BucketEpoch
+from app.history_cache import cache_history, get_cached_history, history_cache_key, invalidate_history_cache
+from app.live_events import live_broadcaster
+from app.models import H5075DeviceAlias, H5075HistoricalMeasurement, H5075HistoryVersion, H5075MeasurementRollup
+from app.rollups import rollup_bucket_minutes_for
 
 
 def health(_: object) -> JsonResponse:
@@ -55,11 +74,139 @@ def auth_logout(request: HttpRequest) -> JsonResponse:
     return JsonResponse({"logged_in": False, "username": ""})
 
 
-def history_values(request: HttpRequest) -> JsonResponse:
-    address = (request.GET.get("address", "") or "").strip()
+def _parse_bound(raw: str) -> datetime | None:
+    """ISO-8601 datetime or date; naive values are taken as UTC. Raises ValueError when unparseable."""
+    parsed = parse_datetime(raw)
+    if parsed is None:
+        day = parse_date(raw)
+        if day is None:
+            raise ValueError(raw)
+        parsed = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def _encode_cursor(kind: str, epoch: int, tiebreak: object) -> str:
+    return urlsafe_b64encode(f"{kind}:{epoch}:{tiebreak}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(raw: str, kind: str) -> tuple[int, str]:
+    """Inverse of :func:`_encode_cursor`; raises ValueError for malformed cursors or cursors of another kind."""
+    try:
+        decoded = urlsafe_b64decode(raw + "=" * (-len(raw) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError(raw) from exc
+
+    parts = decoded.split(":", 2)
+    if len(parts) != 3 or parts[0] != kind or not parts[2]:
+        raise ValueError(raw)
+    return int(parts[1]), parts[2]
+
+
+def _parse_time_range(request: HttpRequest) -> tuple[int | None, dict[str, datetime | None]] | JsonResponse:
+    """``hours`` plus the absolute ``from``/``to`` bounds shared by the history endpoints, or a 400 response."""
     hours_raw = (request.GET.get("hours", "") or "").strip()
+    from_raw = (request.GET.get("from", "") or "").strip()
+    to_raw = (request.GET.get("to", "") or "").strip()
+
+    hours: int | None = None
+    if hours_raw:
+        try:
+            hours = int(hours_raw)
+        except ValueError:
+            return JsonResponse({"error": "Invalid 'hours'. Use an integer."}, status=400)
+
+        if hours <= 0:
+            return JsonResponse({"error": "Invalid 'hours'. Must be > 0."}, status=400)
+
+    bounds: dict[str, datetime | None] = {}
+    for name, raw in (("from", from_raw), ("to", to_raw)):
+        try:
+            bounds[name] = _parse_bound(raw) if raw else None
+        except ValueError:
+            return JsonResponse({"error": f"Invalid '{name}'. Use an ISO-8601 date or datetime."}, status=400)
+
+    if bounds["from"] is not None and bounds["to"] is not None and bounds["from"] >= bounds["to"]:
+        return JsonResponse({"error": "Invalid range. 'from' must be before 'to'."}, status=400)
+
+    return hours, bounds
+
+
+def _watermark_etag(*parts: object) -> str:
+    return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _history_watermark(request: HttpRequest) -> tuple[str, datetime | None]:
+    """ETag and Last-Modified for ``/api/history/`` from index seeks only, however many rows are stored.
+
+    The newest ``created_at`` of the (optionally address-filtered) history table moves with every insert;
+    the :class:`H5075HistoryVersion` counters move with compaction and other edits; the newest alias
+    ``updated_at`` covers renames. Last-Modified is the latest of those three times. A relative ``hours`` window also moves with the clock, so its ETag
+    includes the current minute and it has no Last-Modified.
+    """
+    cached = getattr(request, "_history_watermark", None)
+    if cached is not None:
+        return cached
+
+    address = (request.GET.get("address", "") or "").strip().lower()
+    history = H5075HistoricalMeasurement.objects.order_by()
+    versions = H5075HistoryVersion.objects.order_by()
+    aliases = H5075DeviceAlias.objects.order_by()
+    if address:
+        history = history.filter(address=address)
+        versions = versions.filter(address=address)
+        aliases = aliases.filter(address=address)
+    latest_created = history.aggregate(latest=Max("created_at"))["latest"]
+    version = versions.aggregate(total=Sum("version"), changed=Max("updated_at"))
+    alias_updated = aliases.aggregate(latest=Max("updated_at"))["latest"]
+
+    relative = bool((request.GET.get("hours", "") or "").strip())
+    window = int(timezone.now().timestamp()) // 60 if relative else None
+    etag = _watermark_etag(latest_created, version["total"], alias_updated, window)
+    candidates = [value for value in (latest_created, version["changed"], alias_updated) if value is not None]
+    last_modified = max(candidates) if candidates and not relative else None
+
+    request._history_watermark = (etag, last_modified)
+    return request._history_watermark
+
+
+def _devices_watermark(request: HttpRequest) -> tuple[str, datetime | None]:
+    cached = getattr(request, "_devices_watermark", None)
+    if cached is not None:
+        return cached
+
+    stats = H5075DeviceAlias.objects.order_by().aggregate(rows=Count("id"), latest=Max("updated_at"))
+    request._devices_watermark = (_watermark_etag(stats["rows"], stats["latest"]), stats["latest"])
+    return request._devices_watermark
+
+
+HISTORY_FORMATS = ("json", "columnar", "binary")
+
+# Binary column layout: (name, array typecode, little-endian type as documented in the header).
+BINARY_COLUMNS = (
+    ("measured_at", "I", "u32"),
+    ("temperature_c", "f", "f32"),
+    ("humidity_pct", "f", "f32"),
+)
+BINARY_SAMPLES_COLUMN = ("samples", "I", "u32")
+
+
+@cache_control(no_cache=True)
+@condition(
+    etag_func=lambda request: _history_watermark(request)[0],
+    last_modified_func=lambda request: _history_watermark(request)[1],
+)
+def history_values(request: HttpRequest) -> JsonResponse | HttpResponse:
+    address = (request.GET.get("address", "") or "").strip()
     limit_raw = (request.GET.get("limit", "2000") or "2000").strip()
     bucket_raw = (request.GET.get("bucket_minutes", "") or "").strip()
+    cursor_raw = (request.GET.get("cursor", "") or "").strip()
+    since_raw = (request.GET.get("since", "") or "").strip()
+    response_format = (request.GET.get("format", "json") or "json").strip().lower()
+
+    if response_format not in HISTORY_FORMATS:
+        return JsonResponse({"error": "Invalid 'format'. Use 'json', 'columnar' or 'binary'."}, status=400)
 
     try:
         limit = int(limit_raw)
@@ -83,94 +230,392 @@ def history_values(request: HttpRequest) -> JsonResponse:
 
         bucket_minutes = min(bucket_minutes, 1440)
 
-    hours: int | None = None
-    if hours_raw:
+    time_range = _parse_time_range(request)
+    if isinstance(time_range, JsonResponse):
+        return time_range
+    hours, bounds = time_range
+
+    cursor: tuple[int, str] | None = None
+    if cursor_raw:
         try:
-            hours = int(hours_raw)
+            cursor = _decode_cursor(cursor_raw, "raw" if bucket_minutes is None else f"b{bucket_minutes}")
+            # Raw cursors carry epoch microseconds, bucket cursors epoch seconds.
+            cursor_time = _from_epoch_microseconds(cursor[0] if bucket_minutes is None else cursor[0] * 1_000_000)
+            cursor_id = int(cursor[1]) if bucket_minutes is None else None
         except ValueError:
-            return JsonResponse({"error": "Invalid 'hours'. Use an integer."}, status=400)
-
-        if hours <= 0:
-            return JsonResponse({"error": "Invalid 'hours'. Must be > 0."}, status=400)
-
-    queryset = H5075HistoricalMeasurement.objects.all().order_by("-measured_at")
+            return JsonResponse({"error": "Invalid 'cursor'. Pass back 'next_cursor' from a previous response."}, status=400)
 
+    try:
+        since = _parse_bound(since_raw) if since_raw else None
+    except ValueError:
+        return JsonResponse({"error": "Invalid 'since'. Pass back 'watermark' from a previous response."}, status=400)
+
+    filters = {
+        "address": address or None,
+        "hours": hours,
+        "from": bounds["from"].isoformat() if bounds["from"] is not None else None,
+        "to": bounds["to"].isoformat() if bounds["to"] is not None else None,
+        "cursor": cursor_raw or None,
+        "limit": limit,
+        "bucket_minutes": bucket_minutes,
+        "since": since.isoformat() if since is not None else None,
+    }
+    now = timezone.now()
+    # The ETag (already computed for the conditional GET) covers writes that skip invalidation, such as
+    # alias edits through the ORM, and the minute of relative windows.
+    cache_key = history_cache_key({**filters, "format": response_format, "watermark": _history_watermark(request)[0]})
+    cached = get_cached_history(cache_key)
+    if cached is not None:
+        return cached
+
+    cutoff = now - timedelta(hours=hours) if hours is not None else None
+    next_cursor: str | None = None
+
+    # Taken before the main query: rows stored meanwhile are sent again on the next delta poll, never missed.
+    stored = H5075HistoricalMeasurement.objects.order_by()
     if address:
-        queryset = queryset.filter(address__iexact=address)
-
-    if hours is not None:
-        cutoff = timezone.now() - timedelta(hours=hours)
-        queryset = queryset.filter(measured_at__gte=cutoff)
+        stored = stored.filter(address=address.lower())
+    watermark = stored.aggregate(latest=Max("created_at"))["latest"] or since
 
-    rows = list(queryset[:limit])
-    rows.reverse()
     if bucket_minutes is None:
+        queryset = H5075HistoricalMeasurement.objects.all().order_by("-measured_at", "-id")
+        if address:
+            queryset = queryset.filter(address=address.lower())
+        if cutoff is not None:
+            queryset = queryset.filter(measured_at__gte=cutoff)
+        if bounds["from"] is not None:
+            queryset = queryset.filter(measured_at__gte=bounds["from"])
+        if bounds["to"] is not None:
+            queryset = queryset.filter(measured_at__lt=bounds["to"])
+        if since is not None:
+            queryset = queryset.filter(created_at__gt=since)
+        if cursor is not None:
+            # Keyset pagination: continue strictly below the last (measured_at, id) already returned.
+            queryset = queryset.filter(Q(measured_at__lt=cursor_time) | Q(measured_at=cursor_time, id__lt=cursor_id))
+
+        rows = list(queryset[: limit + 1])
+        truncated = len(rows) > limit
+        rows = rows[:limit]
+        if truncated:
+            oldest = rows[-1]
+            next_cursor = _encode_cursor("raw", _epoch_microseconds(oldest.measured_at), oldest.id)
+        rows.reverse()
         address_keys = {(row.address or "").strip().lower() for row in rows if row.address}
         alias_map = {item.address.lower(): item.display_name for item in H5075DeviceAlias.objects.filter(address__in=address_keys)}
-        points = [
-            {
-                "address": row.address,
-                "name": alias_map.get((row.address or "").strip().lower(), row.name),
-                "measured_at": row.measured_at.isoformat(),
-                "temperature_c": float(row.temperature_c),
-                "humidity_pct": float(row.humidity_pct),
-            }
+        records = [
+            (
+                row.address,
+                alias_map.get((row.address or "").strip().lower(), row.name),
+                row.measured_at,
+                float(row.temperature_c),
+                float(row.humidity_pct),
+                None,
+            )
             for row in rows
         ]
     else:
-        bucket_seconds = bucket_minutes * 60
-        bucket_map: dict[tuple[str, int], dict[str, object]] = {}
-
-        for row in rows:
-            normalized_address = (row.address or "").strip().lower()
-            measured_at_epoch = int(row.measured_at.timestamp())
-            bucket_epoch = measured_at_epoch - (measured_at_epoch % bucket_seconds)
-            key = (normalized_address, bucket_epoch)
-
-            current = bucket_map.get(key)
-            if current is None:
-                bucket_map[key] = {
-                    "address": row.address,
-                    "name": row.name,
-                    "bucket_epoch": bucket_epoch,
-                    "temperature_sum": float(row.temperature_c),
-                    "humidity_sum": float(row.humidity_pct),
-                    "count": 1,
-                }
-            else:
-                current["temperature_sum"] = float(current["temperature_sum"]) + float(row.temperature_c)
-                current["humidity_sum"] = float(current["humidity_sum"]) + float(row.humidity_pct)
-                current["count"] = int(current["count"]) + 1
+        starts = [value for value in (cutoff, bounds["from"]) if value is not None]
+        rollups = H5075MeasurementRollup.objects.filter(
+            _rollup_range(bucket_minutes, max(starts) if starts else None, bounds["to"]),
+            source=H5075MeasurementRollup.SOURCE_HISTORY,
+        )
+        if address:
+            rollups = rollups.filter(address=address.lower())
 
-        bucketed_rows = sorted(bucket_map.values(), key=lambda item: (int(item["bucket_epoch"]), str(item["address"] or "").lower()))
-        address_keys = {(str(item["address"]) or "").strip().lower() for item in bucketed_rows if item["address"]}
+        grouped = rollups.order_by().values(
+            address_key=F("address"),
+            bucket_epoch=BucketEpoch("bucket_start", bucket_seconds=bucket_minutes * 60),
+        )
+        if cursor is not None:
+            grouped = grouped.filter(
+                Q(bucket_epoch__lt=cursor[0]) | Q(bucket_epoch=cursor[0], address_key__lt=cursor[1])
+            )
+        if since is not None:
+            grouped = grouped.filter(
+                _touched_buckets(stored.filter(created_at__gt=since), bucket_minutes, cutoff, bounds)
+            )
+
+        buckets = list(
+            grouped.annotate(
+                sample_count=Sum("samples"),
+                temperature_total=Sum("temperature_sum"),
+                humidity_total=Sum("humidity_sum"),
+            ).order_by("-bucket_epoch", "-address_key")[: limit + 1]
+        )
+        truncated = len(buckets) > limit
+        buckets = buckets[:limit]
+        if truncated:
+            oldest = buckets[-1]
+            next_cursor = _encode_cursor(f"b{bucket_minutes}", int(oldest["bucket_epoch"]), oldest["address_key"])
+        buckets.reverse()
+        address_keys = {item["address_key"] for item in buckets if item["address_key"]}
         alias_map = {item.address.lower(): item.display_name for item in H5075DeviceAlias.objects.filter(address__in=address_keys)}
+        alias_map.update(_latest_history_names(address_keys - set(alias_map)))
+
+        records = [
+            (
+                item["address_key"],
+                alias_map.get(item["address_key"], item["address_key"]),
+                datetime.fromtimestamp(int(item["bucket_epoch"]), tz=dt_timezone.utc),
+                item["temperature_total"] / item["sample_count"],
+                item["humidity_total"] / item["sample_count"],
+                int(item["sample_count"]),
+            )
+            for item in buckets
+        ]
 
-        points = [
-            {
-                "address": item["address"],
-                "name": alias_map.get((str(item["address"]) or "").strip().lower(), item["name"]),
-                "measured_at": datetime.fromtimestamp(int(item["bucket_epoch"]), tz=dt_timezone.utc).isoformat(),
-                "temperature_c": float(item["temperature_sum"]) / int(item["count"]),
-                "humidity_pct": float(item["humidity_sum"]) / int(item["count"]),
+    envelope = {
+        "count": len(records),
+        "truncated": truncated,
+        "next_cursor": next_cursor,
+        "watermark": watermark.isoformat() if watermark is not None else None,
+        "filters": filters,
+    }
+
+    if response_format == "json":
+        points = []
+        for point_address, name, measured_at, temperature_c, humidity_pct, samples in records:
+            point = {
+                "address": point_address,
+                "name": name,
+                "measured_at": measured_at.isoformat(),
+                "temperature_c": temperature_c,
+                "humidity_pct": humidity_pct,
             }
-            for item in bucketed_rows
-        ]
+            if samples is not None:
+                point["samples"] = samples
+            points.append(point)
+        response = JsonResponse({**envelope, "points": points})
+    else:
+        series = _columnar_series(records, with_samples=bucket_minutes is not None)
+        if response_format == "columnar":
+            response = JsonResponse({**envelope, "format": "columnar", "series": series})
+        else:
+            response = _binary_history_response(envelope, series, with_samples=bucket_minutes is not None)
+
+    cache_history(cache_key, response)
+    return response
+
+
+def _rollup_range(bucket_minutes: int, start: datetime | None, end: datetime | None) -> Q:
+    """Rollup rows that cover exactly ``[start, end)`` for buckets of ``bucket_minutes``.
+
+    Whole buckets of the coarsest fitting granularity are used inside the range; the partial edges that
+    such buckets would over- or under-count come from the 1-minute rollups (history timestamps are
+    snapped to the minute, so those are exact).
+    """
+    granularity = rollup_bucket_minutes_for(bucket_minutes)
+
+    def covering(minutes: int, low: datetime | None, high: datetime | None) -> Q:
+        condition = Q(bucket_minutes=minutes)
+        if low is not None:
+            condition &= Q(bucket_start__gte=low)
+        if high is not None:
+            condition &= Q(bucket_start__lt=high)
+        return condition
+
+    if granularity == 1:
+        return covering(1, start, end)
+
+    step = granularity * 60
+    inner_start = inner_end = None
+    if start is not None:
+        inner_start = datetime.fromtimestamp(math.ceil(start.timestamp() / step) * step, tz=dt_timezone.utc)
+    if end is not None:
+        inner_end = datetime.fromtimestamp(math.floor(end.timestamp() / step) * step, tz=dt_timezone.utc)
+    if inner_start is not None and inner_end is not None and inner_start >= inner_end:
+        return covering(1, start, end)
+
+    condition = covering(granularity, inner_start, inner_end)
+    if start is not None and inner_start > start:
+        condition |= covering(1, start, inner_start)
+    if end is not None and inner_end < end:
+        condition |= covering(1, inner_end, end)
+    return condition
+
+
+def _latest_history_names(address_keys: set[str]) -> dict[str, str]:
+    """Stored name of the newest history row per address, one index seek each (for devices without an alias row)."""
+    names = {}
+    for address_key in sorted(address_keys):
+        name = (
+            H5075HistoricalMeasurement.objects.filter(address=address_key)
+            .order_by("-measured_at")
+            .values_list("name", flat=True)
+            .first()
+        )
+        if name:
+            names[address_key] = name
+    return names
+
+
+def _touched_buckets(
+    new_rows, bucket_minutes: int, cutoff: datetime | None, bounds: dict[str, datetime | None]
+) -> Q:
+    """Filter on the ``address_key``/``bucket_epoch`` annotations matching the buckets that ``new_rows`` fall in.
+
+    Delta polls with ``bucket_minutes`` return these buckets whole, so the client replaces its copies.
+    """
+    if cutoff is not None:
+        new_rows = new_rows.filter(measured_at__gte=cutoff)
+    if bounds["from"] is not None:
+        new_rows = new_rows.filter(measured_at__gte=bounds["from"])
+    if bounds["to"] is not None:
+        new_rows = new_rows.filter(measured_at__lt=bounds["to"])
+
+    touched: dict[str, set[int]] = {}
+    for item in new_rows.values(
+        address_key=F("address"), bucket_epoch=BucketEpoch("measured_at", bucket_seconds=bucket_minutes * 60)
+    ).distinct():
+        touched.setdefault(item["address_key"], set()).add(int(item["bucket_epoch"]))
+
+    touched_filter = Q(pk__in=[])
+    for address_key, epochs in touched.items():
+        touched_filter |= Q(address_key=address_key, bucket_epoch__in=sorted(epochs))
+    return touched_filter
+
+
+def _columnar_series(records: list[tuple], with_samples: bool) -> list[dict[str, object]]:
+    """Group records per address into parallel arrays with epoch-second timestamps."""
+    series: dict[str, dict[str, object]] = {}
+    for address, name, measured_at, temperature_c, humidity_pct, samples in records:
+        entry = series.get(address)
+        if entry is None:
+            entry = {"address": address, "name": name, "measured_at": [], "temperature_c": [], "humidity_pct": []}
+            if with_samples:
+                entry["samples"] = []
+            series[address] = entry
+
+        entry["measured_at"].append(int(measured_at.timestamp()))
+        entry["temperature_c"].append(temperature_c)
+        entry["humidity_pct"].append(humidity_pct)
+        if with_samples:
+            entry["samples"].append(samples)
+    return list(series.values())
+
+
+def _binary_history_response(envelope: dict, series: list[dict[str, object]], with_samples: bool) -> HttpResponse:
+    """Typed-array encoding of the columnar series.
+
+    Body: little-endian uint32 header length, a UTF-8 JSON header padded to a multiple of 8 bytes, then for
+    each series in header order one little-endian array per column listed in ``columns``.
+    """
+    columns = BINARY_COLUMNS + ((BINARY_SAMPLES_COLUMN,) if with_samples else ())
+    header = {
+        **envelope,
+        "format": "binary",
+        "columns": [{"name": name, "type": type_name} for name, _, type_name in columns],
+        "series": [{"address": item["address"], "name": item["name"], "count": len(item["measured_at"])} for item in series],
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    header_bytes += b" " * (-(len(header_bytes) + 4) % 8)
+
+    body = bytearray(struct.pack("<I", len(header_bytes)))
+    body += header_bytes
+    for item in series:
+        for name, typecode, _ in columns:
+            values = array(typecode, item[name])
+            if sys.byteorder == "big":
+                values.byteswap()
+            body += values.tobytes()
+
+    return HttpResponse(bytes(body), content_type="application/octet-stream")
+
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_FIELDS = ["address", "name", "measured_at", "temperature_c", "humidity_pct"]
+EXPORT_CHUNK_SIZE = 2000
 
-    return JsonResponse(
-        {
-            "count": len(points),
-            "filters": {
-                "address": address or None,
-                "hours": hours,
-                "limit": limit,
-                "bucket_minutes": bucket_minutes,
-            },
-            "points": points,
-        }
+
+@require_GET
+def history_export(request: HttpRequest) -> JsonResponse | StreamingHttpResponse:
+    address = (request.GET.get("address", "") or "").strip()
+    export_format = (request.GET.get("format", "ndjson") or "ndjson").strip().lower()
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return JsonResponse({"error": "Invalid 'format'. Use 'ndjson' or 'csv'."}, status=400)
+
+    time_range = _parse_time_range(request)
+    if isinstance(time_range, JsonResponse):
+        return time_range
+    hours, bounds = time_range
+
+    queryset = H5075HistoricalMeasurement.objects.order_by("measured_at", "id")
+    if address:
+        queryset = queryset.filter(address=address.lower())
+    if hours is not None:
+        queryset = queryset.filter(measured_at__gte=timezone.now() - timedelta(hours=hours))
+    if bounds["from"] is not None:
+        queryset = queryset.filter(measured_at__gte=bounds["from"])
+    if bounds["to"] is not None:
+        queryset = queryset.filter(measured_at__lt=bounds["to"])
+
+    alias_map = {item.address: item.display_name for item in H5075DeviceAlias.objects.all()}
+
+    response = StreamingHttpResponse(
+        _export_chunks(queryset, alias_map, export_format), content_type=EXPORT_CONTENT_TYPES[export_format]
     )
+    response["Content-Disposition"] = f'attachment; filename="h5075-history.{export_format}"'
+    return response
+
+
+async def _export_chunks(queryset, alias_map: dict[str, str], export_format: str):
+    """Serialise the export page by page, yielding one string per ``EXPORT_CHUNK_SIZE`` rows.
+
+    An async iterator, because under ASGI Django reads a sync one into memory in full before sending it.
+    Each page is a separate keyset query on ``(measured_at, id)``, so only one page is held at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if export_format == "csv" else None
+    if writer is not None:
+        writer.writerow(EXPORT_FIELDS)
+
+    after: tuple[datetime, int] | None = None
+    while True:
+        page = await sync_to_async(_export_page)(queryset, after)
+        for row_id, address, name, measured_at, temperature_c, humidity_pct in page:
+            values = [address, alias_map.get(address, name), measured_at.isoformat(), temperature_c, humidity_pct]
+            if writer is not None:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), separators=(",", ":")))
+                buffer.write("\n")
+
+        if buffer.tell():
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if len(page) < EXPORT_CHUNK_SIZE:
+            return
+        after = (page[-1][3], page[-1][0])
 
 
+def _export_page(queryset, after: tuple[datetime, int] | None) -> list[tuple]:
+    if after is not None:
+        measured_at, row_id = after
+        queryset = queryset.filter(Q(measured_at__gt=measured_at) | Q(measured_at=measured_at, id__gt=row_id))
+    return list(queryset.values_list("id", *EXPORT_FIELDS)[:EXPORT_CHUNK_SIZE])
+
+
+def _epoch_microseconds(value: datetime) -> int:
+    return int(value.timestamp()) * 1_000_000 + value.microsecond
+
+
+def _from_epoch_microseconds(value: int) -> datetime:
+    """Inverse of :func:`_epoch_microseconds`; raises ValueError outside the range of ``datetime``."""
+    try:
+        return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=value)
+    except OverflowError as exc:
+        raise ValueError(value) from exc
+
+
+@cache_control(no_cache=True)
+@condition(
+    etag_func=lambda request: _devices_watermark(request)[0],
+    last_modified_func=lambda request: _devices_watermark(request)[1],
+)
 def devices(request: HttpRequest) -> JsonResponse:
     if request.method == "POST":
         if not request.user.is_authenticated:
@@ -193,6 +638,7 @@ def devices(request: HttpRequest) -> JsonResponse:
         row, _ = H5075DeviceAlias.objects.get_or_create(address=address)
         row.alias = alias
         row.save(update_fields=["alias", "updated_at"])
+        invalidate_history_cache([row.address])
 
         return JsonResponse(
             {
@@ -219,3 +665,32 @@ def devices(request: HttpRequest) -> JsonResponse:
         for row in rows
     ]
     return JsonResponse({"count": len(payload), "devices": payload})
+
+
+async def live_events(request: HttpRequest) -> HttpResponse:
+    """Server-Sent Events stream of rows stored after the client connected.
+
+    ``measurement`` events carry live readings and ``history`` events rows from history syncs. All
+    clients of a process share one watcher, see :mod:`app.live_events`. Needs an ASGI server.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed."}, status=405)
+
+    subscriber = await live_broadcaster.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.get(), timeout=settings.LIVE_KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    # Comment line so proxies keep the idle connection open.
+                    yield ": keepalive\n\n"
+        finally:
+            live_broadcaster.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response